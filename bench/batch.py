@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+# K candidate plans of one generated scenario (see generate.py), each valid or broken by a
+# random defect, checked one by one with the ground engine and at once with
+# symAI.batch_validate. The first failure of every candidate must agree between the two.
+# With --z3, also the cost the batch saves: z3 on every candidate, against the batch plus
+# z3 on the first valid candidate only.
+#
+#   bench/batch.py --K 16,64,256 --bots 10 --T 20
+import sys,os,time,random,argparse,contextlib,io
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+sys.path.insert(0, here)
+import symAI, generate
+
+def candidates(N,num_bots,T,K,seed):
+  # candidates of the valid plan's scenario: a broken plan can also fail by ending off a goal
+  sc, plan, _ = generate.generate(N,num_bots,T,seed=seed)
+  rng = random.Random(seed)
+  plans = []
+  for k in range(K):
+    defect = rng.choice([None]+generate.DEFECTS[:3])
+    _, broken, _ = generate.generate(N,num_bots,T,defect,seed=seed) if defect else (sc,plan,None)
+    plans.append({bot:[list(c) for c in route] for bot,route in broken.items()})
+  return sc, plans
+
+def first_failure(plan):
+  with contextlib.redirect_stdout(io.StringIO()):
+    llm_plan = symAI.normalize_plan({bot:list(route) for bot,route in plan.items()})
+    T = len(llm_plan[symAI.bots[0]])-1
+    failure = symAI.ground_validate(llm_plan,T)[1]
+  return None if failure is None else (failure[0],failure[1][-1])
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--K', default='16,64,256', help='candidates per batch')
+  parser.add_argument('--N', type=int, default=32)
+  parser.add_argument('--bots', type=int, default=10)
+  parser.add_argument('--T', type=int, default=20)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--z3', action='store_true')
+  args = parser.parse_args()
+  print(f"{'K':>5} {'valid':>6} {'one by one s':>13} {'batch s':>9} {'speedup':>8}  agree"+
+        (f" {'z3 all s':>9} {'batch+z3 s':>11}" if args.z3 else ''))
+  for K in map(int,args.K.split(',')):
+    sc, plans = candidates(args.N,args.bots,args.T,K,args.seed)
+    symAI.use_scenario(sc)
+    start = time.perf_counter()
+    expected = [first_failure(plan) for plan in plans]
+    loop = time.perf_counter()-start
+    start = time.perf_counter()
+    results = symAI.batch_validate(plans)
+    batch = time.perf_counter()-start
+    found = [None if r['verdict']=='SAT' else (r['t'],r['name']) for r in results]
+    agree = sum(a==b for a,b in zip(expected,found))
+    line = f"{K:>5} {found.count(None):>6} {loop:>13.4f} {batch:>9.4f} {loop/batch:>8.1f}  {agree:>5}/{K}"
+    if args.z3:
+      start = time.perf_counter()
+      for plan in plans:
+        symAI.validate_plan(plan,engine='z3',template=False)
+      z3_all = time.perf_counter()-start
+      first_valid = found.index(None) if None in found else None
+      start = time.perf_counter()
+      if first_valid is not None:
+        symAI.validate_plan(plans[first_valid],engine='z3',template=False)
+      line += f" {z3_all:>9.3f} {batch+time.perf_counter()-start:>11.3f}"
+    print(line)
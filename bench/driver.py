@@ -0,0 +1,46 @@
+#!/usr/bin/python3
+# The shipped realtime planners validated two ways: the file pipeline (the planner script
+# prints its plan, saved to a file, then symAI.py --plan in a new interpreter) and in
+# process (symAI.load_planner + symAI.validate_plan, no JSON, no file, no subprocess).
+#
+#   bench/driver.py --engine z3 --repeat 3
+import sys,os,glob,time,argparse,subprocess,tempfile
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+import symAI
+
+def pipeline(planner_file,engine,workdir):
+  plan_file = os.path.join(workdir,os.path.basename(planner_file).split('.')[0]+'.json')
+  with open(plan_file,'w') as g:
+    subprocess.run([sys.executable,planner_file],stdout=g,check=True)
+  out = subprocess.run([sys.executable,os.path.join(root,'symAI.py'),'--plan',plan_file,'--obstacles','[(6,14)]',
+                        '--engine',engine],capture_output=True,text=True).stdout
+  return 'SAT' if '\nSAT\n' in out else 'UNSAT'
+
+def in_process(planner_file,engine):
+  return symAI.validate_plan(symAI.load_planner(planner_file)(),engine=engine)['verdict']
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--engine', choices=['auto','z3','ground'], default='auto')
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args()
+  symAI.obstacles = [(6,14)]
+  planners = sorted(glob.glob(os.path.join(root,'realtime','v*.deepseek_planner.py')))
+  print(f"{'planner':<32} {'verdict':>7} {'pipeline s':>11} {'in process s':>13}")
+  total = [0,0]
+  with tempfile.TemporaryDirectory() as workdir:
+    for planner_file in planners:
+      times = []
+      for run in (lambda: pipeline(planner_file,args.engine,workdir), lambda: in_process(planner_file,args.engine)):
+        best = None
+        for _ in range(args.repeat):
+          start = time.perf_counter()
+          verdict = run()
+          elapsed = time.perf_counter()-start
+          best = elapsed if best is None else min(best,elapsed)
+        times.append(best)
+      total = [a+b for a,b in zip(total,times)]
+      print(f"{os.path.relpath(planner_file,root):<32} {verdict:>7} {times[0]:>11.3f} {times[1]:>13.4f}")
+  print(f"{'total':<32} {'':>7} {total[0]:>11.3f} {total[1]:>13.4f}")
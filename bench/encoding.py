@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+# Int vs bit-vector coordinates on the shipped plans, z3 engine only.
+import sys,os,json,time,argparse,contextlib,io
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+import symAI
+
+PLANS = [('v0.json',[]), ('v1.json',[])] + \
+        [(f'realtime/v{i}.json',[(6,14)]) for i in range(1,8)]
+
+def run(plan,T,encoding):
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    prefix, failure = symAI.z3_validate(plan,T,encoding=encoding)
+  elapsed = time.perf_counter()-start
+  return elapsed, ('SAT' if failure is None else f'UNSAT@{failure[0]}'), prefix
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--untrimmed', action='store_true', help='validate the full horizon, without removing trailing sit-at-goal steps')
+  args = parser.parse_args()
+  print(f"{'plan':<18} {'T':>3} {'verdict':>9} {'int s':>8} {'bv s':>8} {'speedup':>8}")
+  for plan_file, obstacles in PLANS:
+    symAI.obstacles = obstacles
+    with open(os.path.join(root,plan_file)) as f:
+      plan = json.load(f)
+    if not args.untrimmed:
+      plan = symAI.normalize_plan(plan)
+    T = len(plan['BotA'])-1
+    t_int, v_int, p_int = run(plan,T,'int')
+    t_bv, v_bv, p_bv = run(plan,T,'bv')
+    verdict = v_int if (v_int,p_int)==(v_bv,p_bv) else f'{v_int}!={v_bv}'
+    print(f"{plan_file:<18} {T:>3} {verdict:>9} {t_int:>8.2f} {t_bv:>8.2f} {t_int/t_bv:>8.2f}")
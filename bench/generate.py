@@ -0,0 +1,110 @@
+#!/usr/bin/python3
+# Synthetic scenarios and plans for any grid size, bot count and horizon.
+# Every bot follows its own segment of a boustrophedon path through the grid (row 0 left
+# to right, row 1 right to left, ...), so trails are disjoint, never revisit a cell and
+# only make unit moves: the plan is valid. A defect then breaks it at a chosen step:
+#   collision   two bots in the same cell at step t
+#   tether      a bot enters at step t the cell another bot left at step t-1
+#   jump        a bot skips a cell between steps t-1 and t (motion law)
+#   obstacle    an obstacle on a bot's cell at step t
+#
+#   bench/generate.py --N 64 --bots 40 --T 60 --defect tether --out /tmp/s
+#   ./symAI.py --scenario /tmp/s.scenario.json --plan /tmp/s.json
+import sys,json,random,argparse
+
+DEFECTS = ['collision','tether','jump','obstacle']
+
+def bot_names(count):
+  # BotA .. BotZ, BotAA, BotAB, ...
+  names = []
+  for i in range(count):
+    name = ''
+    i += 1
+    while i:
+      i, r = divmod(i-1,26)
+      name = chr(65+r)+name
+    names.append('Bot'+name)
+  return names
+
+def snake(N):
+  return [(x if y%2==0 else N-1-x, y) for y in range(N) for x in range(N)]
+
+def generate(N,num_bots,T,defect=None,t=None,num_obstacles=0,seed=0):
+  # returns the scenario, the plan and where the defect is expected to be reported
+  rng = random.Random(seed)
+  if N < 4 or num_bots < 2 or T < 3:
+    raise ValueError("needs N >= 4, at least 2 bots and T >= 3")
+  stride = T+2      # a free cell between segments, for the jump defect to step into
+  if num_bots*stride > N*N:
+    raise ValueError(f"{num_bots} bots of {T} steps do not fit on a {N}x{N} grid")
+  path = snake(N)
+  bots = bot_names(num_bots)
+  # the first bot runs the whole horizon, the others stop at random lengths
+  lengths = [T]+[rng.randint(1,T) for _ in bots[1:]]
+  plan = {}
+  for k, bot in enumerate(bots):
+    segment = path[k*stride:k*stride+lengths[k]+1]
+    plan[bot] = [list(c) for c in segment]+[list(segment[-1])]*(T-lengths[k])
+  obstacles = []
+  expected = None
+
+  if defect is not None:
+    if defect not in DEFECTS:
+      raise ValueError(f"unknown defect {defect}, among {', '.join(DEFECTS)}")
+    last = (T-1)//2
+    if t is None:
+      t = rng.randint(1,last)
+    if not 1 <= t <= last:
+      raise ValueError(f"the defect step must be in [1,{last}]")
+    # BotA runs path[0..T]: the defect is built on it with BotB
+    a, b = bots[0], bots[1]
+    if defect in ('collision','tether'):
+      # BotB walks BotA's segment backwards from cell 2t (2t+1) and meets it at step t
+      first = 2*t if defect=='collision' else 2*t+1
+      route = [path[first-u] for u in range(first+1)]
+      plan[b] = [list(c) for c in route]+[list(route[-1])]*(T-first)
+      expected = (t if defect=='collision' else t+1, 'mutual_avoid')
+    elif defect=='jump':
+      route = path[:t]+path[t+1:T+2]
+      plan[a] = [list(c) for c in route]
+      expected = (t, 'motion_law')
+    else:
+      obstacles.append(tuple(path[t]))
+      expected = (t, 'avoid_obstacle')
+
+  occupied = {tuple(c) for route in plan.values() for c in route}
+  free = [c for c in path if c not in occupied]
+  obstacles += rng.sample(free,min(num_obstacles,len(free)))
+  sc = {'N':N, 'bots':bots,
+        'start_positions':{bot:plan[bot][0] for bot in bots},
+        'goal_positions':{bot:plan[bot][-1] for bot in bots},
+        'obstacles':[list(o) for o in obstacles]}
+  return sc, plan, expected
+
+def write(prefix,sc,plan):
+  with open(prefix+'.scenario.json','w') as g:
+    json.dump(sc,g)
+  with open(prefix+'.json','w') as g:
+    json.dump(plan,g)
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--N', type=int, default=30, help='grid size')
+  parser.add_argument('--bots', type=int, default=10)
+  parser.add_argument('--T', type=int, default=20, help='horizon')
+  parser.add_argument('--defect', choices=DEFECTS, help='break the plan, by default it is valid')
+  parser.add_argument('--t', type=int, help='step of the defect, random in [1,(T-1)/2] by default')
+  parser.add_argument('--obstacles', type=int, default=0, help='obstacles off the trails')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--out', required=True, help='writes OUT.scenario.json and OUT.json')
+  args = parser.parse_args()
+  try:
+    sc, plan, expected = generate(args.N,args.bots,args.T,args.defect,args.t,args.obstacles,args.seed)
+  except ValueError as e:
+    print("error.", e)
+    sys.exit(1)
+  write(args.out,sc,plan)
+  if expected is None:
+    print("valid plan")
+  else:
+    print(f"expected failure at t={expected[0]}: {expected[1]}")
@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+# Peak memory of the z3 engine on realtime/v7.json, untrimmed (45 steps) by default.
+# Each run is a fresh process: peak RSS, Z3's own allocation estimate, the assertions
+# of the prefix solver and the wall time.
+import sys,os,json,time,resource,argparse,contextlib,io,ast
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+def run(plan_file,obstacles,trim):
+  import symAI
+  from z3 import Solver,Z3_get_estimated_alloc_size
+  symAI.obstacles = obstacles
+  base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  with open(plan_file) as f:
+    plan = json.load(f)
+  if trim:
+    plan = symAI.normalize_plan(plan)
+  T = max(len(route) for route in plan.values())-1
+  s = Solver()
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    prefix, failure = symAI.z3_validate(plan,T,prefix_solver=s)
+  return {'T':T, 'sat':failure is None, 'seconds':round(time.perf_counter()-start,3),
+          'assertions':len(s.assertions()),
+          'z3_mb':round(Z3_get_estimated_alloc_size()/2**20,1),
+          'rss_mb':round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,1),
+          'import_mb':round(base/1024,1)}
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--plan', default=os.path.join(os.path.dirname(here),'realtime','v7.json'))
+  parser.add_argument('--obstacles', default='[(6,14)]')
+  parser.add_argument('--trim', action='store_true', help='trim trailing waits first, as symAI.py does')
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args()
+  ctx = multiprocessing.get_context('spawn')
+  print(f"{'T':>4} {'sat':>5} {'seconds':>8} {'asserts':>8} {'z3 MB':>7} {'RSS MB':>7} {'after import':>12}")
+  for _ in range(args.repeat):
+    with ctx.Pool(1) as pool:
+      r = pool.apply(run,(args.plan,ast.literal_eval(args.obstacles),args.trim))
+    print(f"{r['T']:>4} {str(r['sat']):>5} {r['seconds']:>8} {r['assertions']:>8} {r['z3_mb']:>7} {r['rss_mb']:>7} {r['import_mb']:>12}")
@@ -0,0 +1,61 @@
+#!/usr/bin/python3
+# Latency of the reference planner (symAI.reference_plan: prioritized space-time A*, then
+# conflict-based search) on the shipped scenario, on generated ones (see generate.py) and
+# on scattered starts and goals, each plan checked with the ground engine. For comparison,
+# the shipped LLM loop needed 7 plans (realtime/v1..v7) to reach a valid one.
+#
+#   bench/planner.py --bots 10,20,40 --scatter 5,10,20
+import sys,os,time,random,argparse,contextlib,io
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+sys.path.insert(0, here)
+
+def scatter(N,num_bots,seed=0):
+  # distinct random starts and goals, no obstacles
+  import generate
+  cells = random.Random(seed).sample([(x,y) for x in range(N) for y in range(N)],2*num_bots)
+  names = generate.bot_names(num_bots)
+  return {'N':N, 'bots':names, 'obstacles':[],
+          'start_positions':dict(zip(names,cells[:num_bots])),
+          'goal_positions':dict(zip(names,cells[num_bots:]))}
+
+def run(sc,budget):
+  import symAI
+  symAI.use_scenario(sc)
+  start = time.perf_counter()
+  plan, method, nodes = symAI.reference_plan(budget=budget)
+  elapsed = time.perf_counter()-start
+  r = {'method':method, 'nodes':nodes, 'seconds':round(elapsed,4), 'T':None, 'verdict':'no plan'}
+  if plan is not None:
+    T = len(plan[sc['bots'][0]])-1
+    with contextlib.redirect_stdout(io.StringIO()):
+      failure = symAI.ground_validate(plan,T)[1]
+    r.update(T=T, verdict='SAT' if failure is None else f"UNSAT@{failure[0]}")
+  return r
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--bots', default='10,20,40', help='bot counts of the generated scenarios')
+  parser.add_argument('--N', type=int, default=32, help='grid size of the generated scenarios')
+  parser.add_argument('--T', type=int, default=16, help='horizon of the generated scenarios')
+  parser.add_argument('--scatter', default='5,10,20', help='bot counts of the scattered scenarios')
+  parser.add_argument('--scatter-N', type=int, default=12)
+  parser.add_argument('--budget', type=int, default=1000, help='conflict-based search nodes')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+  import symAI, generate
+
+  cases = [('shipped',dict(symAI.scenario(),obstacles=[[6,14]]))]
+  for num_bots in map(int,args.bots.split(',')):
+    cases.append((f"gen {num_bots} bots",generate.generate(args.N,num_bots,args.T,seed=args.seed)[0]))
+  for num_bots in map(int,args.scatter.split(',')):
+    cases.append((f"scatter {num_bots}",scatter(args.scatter_N,num_bots,args.seed)))
+  ctx = multiprocessing.get_context('spawn')
+  print(f"{'scenario':<14} {'planner':<12} {'nodes':>6} {'seconds':>8} {'T':>4}  verdict")
+  for name, sc in cases:
+    with ctx.Pool(1) as pool:
+      r = pool.apply(run,(sc,args.budget))
+    print(f"{name:<14} {r['method']:<12} {r['nodes']:>6} {r['seconds']:>8.3f} {str(r['T']):>4}  {r['verdict']}")
+  print()
+  print("LLM loop on the shipped scenario: 7 plans (realtime/v1..v7), 11 timesteps")
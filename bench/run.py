@@ -0,0 +1,158 @@
+#!/usr/bin/python3
+# Validates every shipped plan with each engine and checks the verdict against the stored
+# .SAT_core/.UNSAT_core files, then records wall time, per-timestep time, peak RSS and
+# assertion counts to a JSON results file and compares it with a stored baseline.
+#
+#   bench/run.py                      run, write bench/results.json, compare with bench/baseline.json
+#   bench/run.py --update-baseline    run and store the results as the new baseline
+import sys,os,re,json,time,resource,argparse,contextlib,io
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+
+# plan, obstacles, stored validator output
+SHIPPED = [('v0.json',[],'v0.UNSAT_core'),
+           ('v1.json',[],'v1.SAT_core')] + \
+          [(f'realtime/v{i}.json',[(6,14)],f'realtime/v{i}.UNSAT_core') for i in range(1,7)] + \
+          [('realtime/v7.json',[(6,14)],'realtime/v7.SAT_core')]
+
+ENGINES = {'ground':{'engine':'ground'},
+           'z3':{'engine':'z3'},
+           'z3-bv':{'engine':'z3','encoding':'bv'}}
+
+def stored_result(core_file):
+  # verdict, failing timestep and the constraints the stored run listed at that step.
+  # The stored files predate the "<bot>_move_<t>" -> motion law rename and the
+  # position literals in cores, they only name the violated constraints.
+  with open(os.path.join(root,core_file)) as f:
+    text = f.read()
+  if re.search(r'^SAT$',text,re.M):
+    return {'verdict':'SAT'}
+  blocks = re.findall(r'At t=(\d+), UNSAT Core contains \d+ constraints:\n((?:  .*\n?)*)',text)
+  t = min(int(u) for u,_ in blocks)
+  names = set()
+  for u, body in blocks:
+    if int(u)==t:
+      for name in body.split():
+        m = re.fullmatch(r'(Bot\w)_move_(\d+)',name)
+        names.add(f"{m[1]}_motion_law_ok_from_step_{int(m[2])-1}_to_{m[2]}" if m else name)
+  return {'verdict':'UNSAT','t':t,'core':sorted(names)}
+
+class Stamped(io.TextIOBase):
+  # timestamps the "t .." progress lines of the validators
+  def __init__(self):
+    self.stamps, self.line = [], ''
+  def write(self,s):
+    self.line += s
+    while '\n' in self.line:
+      line, self.line = self.line.split('\n',1)
+      if line.endswith(' ..'):
+        self.stamps.append((int(line.split()[0]),time.perf_counter()))
+    return len(s)
+
+def run(plan_file,obstacles,engine):
+  import symAI
+  from z3 import Solver
+  symAI.obstacles = obstacles
+  with open(os.path.join(root,plan_file)) as f:
+    plan = symAI.normalize_plan(json.load(f))
+  T = len(plan['BotA'])-1
+  options = ENGINES[engine]
+  out = Stamped()
+  solver = Solver()
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(out):
+    if options['engine']=='ground':
+      prefix, failure = symAI.ground_validate(plan,T)
+    else:
+      prefix, failure = symAI.z3_validate(plan,T,prefix_solver=solver,encoding=options.get('encoding','int'))
+  elapsed = time.perf_counter()-start
+  steps, last = [], start
+  for t, stamp in out.stamps[1:]+[(None,start+elapsed)]:
+    steps.append(round(stamp-last,4))
+    last = stamp
+  result = {'plan':plan_file, 'engine':engine, 'timesteps':T,
+            'verdict':'SAT' if failure is None else 'UNSAT', 'longest_valid_prefix':prefix,
+            'seconds':round(elapsed,4), 'step_seconds':steps,
+            'assertions':len(solver.assertions()),
+            'rss_mb':round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,1)}
+  if failure is not None:
+    result['t'] = failure[0]
+    result['core'] = [str(p) for p in failure[1]]
+  return result
+
+def check(result,stored):
+  # the verdict and the failing step must match the stored run, and the core must name one
+  # of the constraints it found violated (cores are not unique, the bv encoding's are larger)
+  if result['verdict']!=stored['verdict']:
+    return f"verdict {result['verdict']}, stored {stored['verdict']}"
+  if result['verdict']=='SAT':
+    return None if result['longest_valid_prefix']==result['timesteps'] else "SAT with a partial prefix"
+  if result['t']!=stored['t']:
+    return f"fails at t={result['t']}, stored t={stored['t']}"
+  violated = [name for name in result['core'] if not re.fullmatch(r'Bot\w_[xy]_\d+_-?\d+',name)]
+  if not set(violated) & set(stored['core']):
+    return f"core names {violated}, stored {stored['core']}"
+  return None
+
+def regressions(results,baseline,tolerance,slack):
+  # slower or bigger than the baseline by more than tolerance (relative) and slack (absolute)
+  found = []
+  base = {(r['plan'],r['engine']):r for r in baseline['results']}
+  for r in results['results']:
+    b = base.get((r['plan'],r['engine']))
+    if b is None:
+      continue
+    for key, extra in (('seconds',slack),('rss_mb',slack*100),('assertions',0)):
+      if r[key] > b[key]*(1+tolerance)+extra:
+        found.append(f"{r['plan']} [{r['engine']}] {key} {b[key]} -> {r[key]}")
+  return found
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--engines', default=','.join(ENGINES), help='comma separated, among '+', '.join(ENGINES))
+  parser.add_argument('--results', default=os.path.join(here,'results.json'))
+  parser.add_argument('--baseline', default=os.path.join(here,'baseline.json'))
+  parser.add_argument('--update-baseline', action='store_true')
+  parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown/growth')
+  parser.add_argument('--slack', type=float, default=0.25, help='allowed absolute slowdown in seconds (x100 for MB)')
+  args = parser.parse_args()
+
+  ctx = multiprocessing.get_context('spawn')
+  results, mismatches = [], []
+  print(f"{'plan':<18} {'engine':<7} {'T':>3} {'verdict':>9} {'seconds':>8} {'max step':>8} {'asserts':>8} {'RSS MB':>7}  stored")
+  for plan_file, obstacles, core_file in SHIPPED:
+    stored = stored_result(core_file)
+    for engine in args.engines.split(','):
+      # one process per run, so that peak RSS is the run's own
+      with ctx.Pool(1) as pool:
+        r = pool.apply(run,(plan_file,obstacles,engine))
+      problem = check(r,stored)
+      r['stored'] = 'ok' if problem is None else problem
+      if problem is not None:
+        mismatches.append(f"{plan_file} [{engine}]: {problem}")
+      results.append(r)
+      verdict = r['verdict'] if 't' not in r else f"UNSAT@{r['t']}"
+      print(f"{plan_file:<18} {engine:<7} {r['timesteps']:>3} {verdict:>9} {r['seconds']:>8.3f} {max(r['step_seconds']):>8.3f} {r['assertions']:>8} {r['rss_mb']:>7}  {r['stored']}")
+
+  results = {'date':time.strftime('%Y-%m-%dT%H:%M:%S'), 'python':sys.version.split()[0], 'results':results}
+  with open(args.results,'w') as g:
+    json.dump(results,g,indent=2)
+  if args.update_baseline:
+    with open(args.baseline,'w') as g:
+      json.dump(results,g,indent=2)
+    print("baseline updated:", args.baseline)
+
+  found = []
+  if not args.update_baseline and os.path.exists(args.baseline):
+    with open(args.baseline) as f:
+      found = regressions(results,json.load(f),args.tolerance,args.slack)
+  print()
+  for line in mismatches:
+    print("MISMATCH", line)
+  for line in found:
+    print("REGRESSION", line)
+  if mismatches or found:
+    sys.exit(1)
+  print("OK")
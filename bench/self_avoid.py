@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+# Growth of the prefix solver with the horizon on realtime/v7.json (untrimmed, 45 steps).
+# Each horizon runs in a fresh process so that peak RSS is per run. A fully pinned valid
+# plan asserts no self-avoid terms (see symAI.self_pairs), so the --free bots only keep
+# their cells at 0 and T and the solver places them in between: each free step is then
+# checked against every earlier one, and those terms grow with T.
+import sys,os,json,math,time,resource,argparse,contextlib,io
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+
+def run(plan_file,horizon,obstacles,free):
+  import symAI
+  from z3 import Solver,Z3_get_estimated_alloc_size
+  symAI.obstacles = obstacles
+  with open(plan_file) as f:
+    plan = {bot:route[:horizon+1] for bot,route in json.load(f).items()}
+  for bot in free:
+    plan[bot] = [cell if t in (0,horizon) else None for t,cell in enumerate(plan[bot])]
+  s = Solver()
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    prefix, failure = symAI.z3_validate(plan,horizon,prefix_solver=s)
+  elapsed = time.perf_counter()-start
+  assertions = [str(a) for a in s.assertions()]
+  return {'horizon':horizon, 'sat':failure is None, 'seconds':round(elapsed,3),
+          'assertions':len(assertions),
+          'self_avoid':sum('self_avoid' in a for a in assertions),
+          'scopes':s.num_scopes(),
+          'z3_mb':round(Z3_get_estimated_alloc_size()/2**20,1),
+          'rss_mb':round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,1)}
+
+def slope(rows,key):
+  # log-log growth exponent between the two largest horizons
+  a,b = rows[-2],rows[-1]
+  if a[key]<=0 or b[key]<=0:
+    return float('nan')
+  return math.log(b[key]/a[key])/math.log(b['horizon']/a['horizon'])
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--plan', default=os.path.join(os.path.dirname(here),'realtime','v7.json'))
+  parser.add_argument('--obstacles', default='[(6,14)]')
+  parser.add_argument('--horizons', default='5,10,15,20,30,44')
+  parser.add_argument('--free', default='BotA', help='bots whose cells strictly between 0 and T are left to the solver')
+  args = parser.parse_args()
+  import ast
+  obstacles = ast.literal_eval(args.obstacles)
+  ctx = multiprocessing.get_context('spawn')
+  rows = []
+  print(f"{'T':>4} {'sat':>5} {'seconds':>9} {'asserts':>8} {'self':>7} {'scopes':>6} {'z3 MB':>7} {'RSS MB':>7}")
+  for h in map(int, args.horizons.split(',')):
+    with ctx.Pool(1) as pool:
+      r = pool.apply(run,(args.plan,h,obstacles,args.free.split(',') if args.free else []))
+    rows.append(r)
+    print(f"{r['horizon']:>4} {str(r['sat']):>5} {r['seconds']:>9} {r['assertions']:>8} {r['self_avoid']:>7} {r['scopes']:>6} {r['z3_mb']:>7} {r['rss_mb']:>7}")
+  if len(rows)>1:
+    print()
+    for key in ('seconds','self_avoid','z3_mb'):
+      print(f"growth exponent of {key} in T: {slope(rows,key):.2f}")
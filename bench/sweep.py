@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+# Validation time and memory against the grid size N, the bot count and the horizon T on
+# generated plans (see generate.py). Each axis is swept with the other two at their base
+# value, each run in a fresh process so that peak RSS is per run. A run is real-time when
+# a timestep validates within --tick seconds.
+#
+#   bench/sweep.py --bots 5,10,20,40 --T 10,20,40 --engines ground,z3 --plot /tmp/sweep
+import sys,os,json,time,resource,argparse,contextlib,io
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(here))
+sys.path.insert(0, here)
+
+def run(N,num_bots,T,engine,defect,seed):
+  import symAI, generate
+  sc, plan, expected = generate.generate(N,num_bots,T,defect,seed=seed)
+  symAI.use_scenario(sc)
+  plan = symAI.normalize_plan(plan)
+  horizon = len(plan[sc['bots'][0]])-1
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    prefix, failure = symAI.validate(plan,horizon,engine)
+  elapsed = time.perf_counter()-start
+  checked = (failure[0] if failure else horizon)+1
+  return {'N':N, 'bots':num_bots, 'T':horizon, 'engine':engine, 'defect':defect,
+          'verdict':'SAT' if failure is None else f"UNSAT@{failure[0]}",
+          'expected':'SAT' if expected is None else f"UNSAT@{expected[0]}",
+          'seconds':round(elapsed,4), 'step_seconds':round(elapsed/checked,5),
+          'rss_mb':round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,1)}
+
+def plot(rows,axes,prefix):
+  try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+  except ImportError:
+    print("matplotlib is not installed, no plots")
+    return
+  for axis in axes:
+    fig, (left,right) = plt.subplots(1,2,figsize=(10,4))
+    for engine in sorted({r['engine'] for r in rows}):
+      runs = [r for r in rows if r['axis']==axis and r['engine']==engine]
+      left.plot([r[axis] for r in runs],[r['seconds'] for r in runs],'o-',label=engine)
+      right.plot([r[axis] for r in runs],[r['rss_mb'] for r in runs],'o-',label=engine)
+    left.set_xlabel(axis); left.set_ylabel('seconds'); left.legend()
+    right.set_xlabel(axis); right.set_ylabel('peak RSS MB'); right.legend()
+    fig.tight_layout()
+    fig.savefig(f"{prefix}.{axis}.png")
+    plt.close(fig)
+    print("plot:", f"{prefix}.{axis}.png")
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--N', default='16,32,64', help='grid sizes')
+  parser.add_argument('--bots', default='5,10,20,40', help='bot counts')
+  parser.add_argument('--T', default='10,20,40', help='horizons')
+  parser.add_argument('--base', default='32,10,20', help='N,bots,T held while another axis is swept')
+  parser.add_argument('--engines', default='ground,z3')
+  parser.add_argument('--defect', help='validate broken plans (see generate.py), valid ones by default')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--tick', type=float, default=1.0, help='real-time budget per timestep, in seconds')
+  parser.add_argument('--out', default=os.path.join(here,'sweep.json'))
+  parser.add_argument('--plot', metavar='PREFIX', help='write PREFIX.<axis>.png (needs matplotlib)')
+  args = parser.parse_args()
+
+  base = dict(zip(('N','bots','T'),map(int,args.base.split(','))))
+  ctx = multiprocessing.get_context('spawn')
+  rows = []
+  print(f"{'axis':<5} {'N':>4} {'bots':>5} {'T':>4} {'engine':<7} {'verdict':>9} {'seconds':>9} {'s/step':>8} {'RSS MB':>7}")
+  for axis in ('N','bots','T'):
+    for value in map(int, getattr(args,axis).split(',')):
+      size = dict(base,**{axis:value})
+      if size['bots']*(size['T']+2) > size['N']**2:
+        print(f"{axis:<5} {size['N']:>4} {size['bots']:>5} {size['T']:>4} skipped, the bots do not fit on the grid")
+        continue
+      for engine in args.engines.split(','):
+        with ctx.Pool(1) as pool:
+          r = pool.apply(run,(size['N'],size['bots'],size['T'],engine,args.defect,args.seed))
+        r['axis'] = axis
+        r['realtime'] = r['step_seconds'] <= args.tick
+        rows.append(r)
+        flag = '' if r['verdict']==r['expected'] else f"  expected {r['expected']}"
+        print(f"{axis:<5} {r['N']:>4} {r['bots']:>5} {r['T']:>4} {engine:<7} {r['verdict']:>9} {r['seconds']:>9.3f} {r['step_seconds']:>8.4f} {r['rss_mb']:>7}{flag}")
+
+  with open(args.out,'w') as g:
+    json.dump(rows,g,indent=1)
+  print()
+  for engine in args.engines.split(','):
+    fleet = [r['bots'] for r in rows if r['axis']=='bots' and r['engine']==engine]
+    fast = [r['bots'] for r in rows if r['axis']=='bots' and r['engine']==engine and r['realtime']]
+    slow = sorted(set(fleet)-set(fast))
+    if slow:
+      print(f"{engine}: not real-time ({args.tick}s per step) from {slow[0]} bots")
+    else:
+      print(f"{engine}: real-time ({args.tick}s per step) up to {max(fleet,default=0)} bots, the largest fleet swept")
+  if args.plot is not None:
+    plot(rows,('N','bots','T'),args.plot)
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+# Full plans against waypoint plans, where the LLM only pins some cells ({t:[x,y]} or null
+# cells) and the solver fills the gaps. Each plan is thinned to one waypoint every --every
+# steps plus its start and goal, validated with the z3 engine, and the completion is checked
+# with the ground engine. Solve time grows with the free cells, but the iterations with the
+# LLM are the real cost: the shipped realtime/ history took 7 plans (v1..v7) to reach a
+# valid one, the waypoint plan of the same scenario is valid at the first round.
+#
+#   bench/waypoints.py --every 4,6 --bots 5,10
+import sys,os,json,time,argparse,contextlib,io
+import multiprocessing
+here = os.path.dirname(os.path.abspath(__file__))
+root = os.path.dirname(here)
+sys.path.insert(0, root)
+sys.path.insert(0, here)
+
+def thin(plan,every):
+  # start, goal and one cell every `every` steps, as {t:[x,y]} waypoints
+  return {bot:{t:route[t] for t in range(len(route)) if t%every==0 or t==len(route)-1} for bot, route in plan.items()}
+
+def run(sc,plan,every):
+  import symAI
+  symAI.use_scenario(sc)
+  plan = symAI.normalize_plan(plan)
+  if every:
+    plan = symAI.normalize_plan(thin(plan,every))
+  T = max(len(route) for route in plan.values())-1
+  completion = {} if not symAI.is_ground(plan) else None
+  start = time.perf_counter()
+  with contextlib.redirect_stdout(io.StringIO()):
+    prefix, failure = symAI.z3_validate(plan,T,completion=completion)
+  elapsed = time.perf_counter()-start
+  checked = None
+  if completion:
+    with contextlib.redirect_stdout(io.StringIO()):
+      checked = symAI.ground_validate(symAI.normalize_plan(completion),T)[1] is None
+  free = sum(cell is None for route in plan.values() for cell in route)
+  return {'T':T, 'free':free, 'verdict':'SAT' if failure is None else f"UNSAT@{failure[0]}",
+          'seconds':round(elapsed,3), 'completion_valid':checked}
+
+def shipped():
+  import symAI
+  with open(os.path.join(root,'realtime','v7.json')) as f:
+    plan = json.load(f)
+  return dict(symAI.scenario(),obstacles=[[6,14]]), plan
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--every', default='3,6', help='waypoint spacings, in steps')
+  parser.add_argument('--bots', default='5,10', help='bot counts of the generated plans')
+  parser.add_argument('--N', type=int, default=32)
+  parser.add_argument('--T', type=int, default=16)
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+  import generate
+
+  cases = [('realtime/v7',)+shipped()]
+  for num_bots in map(int,args.bots.split(',')):
+    sc, plan, _ = generate.generate(args.N,num_bots,args.T,seed=args.seed)
+    cases.append((f"gen {num_bots} bots",sc,plan))
+  ctx = multiprocessing.get_context('spawn')
+  print(f"{'plan':<14} {'every':>5} {'T':>3} {'free':>5} {'verdict':>9} {'seconds':>8}  completion")
+  for name, sc, plan in cases:
+    for every in [0]+list(map(int,args.every.split(','))):
+      with ctx.Pool(1) as pool:
+        r = pool.apply(run,(sc,plan,every))
+      completion = '' if r['completion_valid'] is None else ('valid' if r['completion_valid'] else 'INVALID')
+      print(f"{name:<14} {every or 'full':>5} {r['T']:>3} {r['free']:>5} {r['verdict']:>9} {r['seconds']:>8.3f}  {completion}")
+  print()
+  print("LLM rounds on the shipped scenario: 7 full plans (realtime/v1..v7), 1 waypoint plan")
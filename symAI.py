@@ -1,26 +1,15 @@
 #!/usr/bin/python3
 from z3 import *
-import sys,json
+import sys,os,json,csv,time
 import argparse
 from datetime import datetime
 import functools,ast
+import contextlib,io
+import multiprocessing,concurrent.futures
+import heapq
 print = functools.partial(print, flush=True)    # forces flush=True for all print() calls
 
 obstacles=''
-parser = argparse.ArgumentParser()
-parser.add_argument('--plan', type=str, help='a JSON file containing LLM plan')
-parser.add_argument('--obstacles', type=str, help='a list of obstacle tuples')
-args = parser.parse_args()
-
-if args.obstacles is not None:
-  obstacles = ast.literal_eval(args.obstacles)
-  print("obstacles:")
-  for o in obstacles:
-    print(o)
-
-if args.plan is None:
-  print("error. You must submit a plan file")
-  sys.exit()
 
 N = 30
 num_bots = 10
@@ -28,13 +17,6 @@ bots = []
 start_positions = {}
 goal_positions = {}
 
-
-def dump_unsat(t,s):
-  core = s.unsat_core()
-  print(f"At t={t}, UNSAT Core contains {len(core)} constraints:")
-  for i, constraint_bool in enumerate(core, 1):
-      print(f"  {constraint_bool}")
-
 for i in range(num_bots):
   bot_name = f"Bot{chr(65+i)}"  # A, B, C, ..., J
   bots.append(bot_name)
@@ -43,175 +25,1799 @@ for i in range(num_bots):
   start_positions[bot_name] = start
   goal_positions[bot_name] = goal
 
-print(start_positions)
-print(goal_positions)
 
-with open(args.plan, 'r') as f:
-  llm_plan = json.load(f)
+def dump_core(t,core):
+  print(f"At t={t}, UNSAT Core contains {len(core)} constraints:")
+  for i, constraint_bool in enumerate(core, 1):
+      print(f"  {constraint_bool}")
 
-# Remove trailing duplicate positions from each bot's path
-min_len = min(len(path) for path in llm_plan.values())
-for bot in llm_plan:
-    path = llm_plan[bot]
-    count = 0
-    for i in range(1, min_len):
-        if path[-i] == path[-(i+1)]:
-            count += 1
-        else:
-            break
-    if count > 0:
-        llm_plan[bot] = path[:-(count)]
+def dump_unsat(t,s):
+  dump_core(t,s.unsat_core())
 
-# Find the longest plan length
-max_len = max(len(path) for path in llm_plan.values())
+def pinned_cell(route,t):
+  # the cell a plan pins at step t, None when a coordinate is left free
+  if t >= len(route) or route[t] is None:
+    return None
+  x_val, y_val = route[t]
+  return (x_val, y_val) if x_val is not None and y_val is not None else None
 
-# Pad each bot's plan with its last tuple until it reaches max_len
-for bot, path in llm_plan.items():
-    if len(path) < max_len:
-        last_pos = path[-1]
-        llm_plan[bot].extend([last_pos] * (max_len - len(path)))
+def normalize_plan(llm_plan):
+  # A route given as sparse waypoints {t: [x,y]} becomes a list with null (free) cells
+  for bot, path in llm_plan.items():
+      if isinstance(path,dict):
+          waypoints = {int(t):pos for t,pos in path.items()}
+          llm_plan[bot] = [waypoints.get(t) for t in range(max(waypoints)+1)]
 
-for bot in llm_plan:
-    plen=len(llm_plan[bot])
-    print(plen)
+  # Remove trailing duplicate positions from each bot's path
+  min_len = min(len(path) for path in llm_plan.values())
+  for bot in llm_plan:
+      path = llm_plan[bot]
+      count = 0
+      for i in range(1, min_len):
+          if path[-i] == path[-(i+1)]:
+              count += 1
+          else:
+              break
+      if count > 0:
+          llm_plan[bot] = path[:-(count)]
 
-with open(args.plan+'.plot', 'w') as g:
-  json.dump(llm_plan,g,indent=2)
+  # Find the longest plan length
+  max_len = max(len(path) for path in llm_plan.values())
 
-if len(llm_plan['BotA'])!=len(llm_plan['BotB']):
-  print("ERROR, path len mismatch")
-  sys.exit()
+  # Pad each bot's plan with its last tuple until it reaches max_len
+  for bot, path in llm_plan.items():
+      if len(path) < max_len:
+          last_pos = path[-1]
+          llm_plan[bot].extend([last_pos] * (max_len - len(path)))
+  return llm_plan
 
-T=len(llm_plan['BotA'])-1
-print("Timesteps:",T)
-print()
+def read_plan_json(plan_file,chunk=1<<16):
+  # Incremental reader of the JSON format {bot: [[x,y],...], ...}: routes are decoded one
+  # at a time from a buffer refilled as needed, the whole text is never held at once.
+  decoder = json.JSONDecoder()
+  llm_plan = {}
+  with open(plan_file, 'r') as f:
+    buf, pos = '', 0
+    def more():
+      nonlocal buf, pos
+      data = f.read(chunk)
+      if not data:
+        raise ValueError(f"{plan_file}: unexpected end of the plan")
+      buf, pos = buf[pos:]+data, 0
+    def token():
+      # next non-blank character, not consumed
+      nonlocal pos
+      while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n':
+          pos += 1
+        if pos < len(buf):
+          return buf[pos]
+        more()
+    def value():
+      nonlocal pos
+      token()
+      while True:
+        try:
+          v, end = decoder.raw_decode(buf,pos)
+          if end < len(buf) or not isinstance(v,(int,float)):
+            pos = end
+            return v
+        except json.JSONDecodeError:
+          pass
+        more()   # the value runs past the buffer (or a number may go on)
+    if token()!='{':
+      raise ValueError(f"{plan_file}: a plan is a JSON object")
+    pos += 1
+    while token()!='}':
+      if token()==',':
+        pos += 1
+      bot = value()
+      if token()!=':':
+        raise ValueError(f"{plan_file}: expected ':' after {bot!r}")
+      pos += 1
+      llm_plan[bot] = value()
+  return llm_plan
 
-s = Solver()
-s.set(unsat_core=True)
+def load_plan_array(plan_file):
+  # A plan as one bots x steps x 2 int16 array (.npy), rows in scenario bot order, memory-
+  # mapped. Trailing waits are trimmed on the array: a slice up to the last step where a
+  # bot still moves, which is what normalize_plan does to a padded plan.
+  try:
+    import numpy as np
+  except ImportError:
+    raise ValueError("reading .npy plans needs numpy")
+  routes = np.load(plan_file, mmap_mode='r')
+  if routes.ndim!=3 or routes.shape[0]!=len(bots) or routes.shape[2]!=2:
+    raise ValueError(f"{plan_file}: expected a {len(bots)} x steps x 2 array, got {routes.shape}")
+  # scanned backwards by blocks of steps: only the padded tail and the last moves are read
+  steps = routes.shape[1]
+  end, last = steps, 0
+  while end > 1 and not last:
+    start = max(end-64,1)
+    moved = np.flatnonzero(np.any(routes[:,start:end]!=routes[:,start-1:end-1],axis=(0,2)))
+    if len(moved):
+      last = start+moved[-1]
+    end = start
+  routes = routes[:,:last+1]
+  with open(plan_file+'.plot', 'wb') as g:
+    np.save(g,routes)
+  return routes
 
-positions = {}
-for bot in bots:
-    for t in range(T+1):
-        positions[(bot,t)] = (Int(f"x_{bot}_{t}"), Int(f"y_{bot}_{t}"))
-
-prefix_solver = Solver()
-
-longest_valid_prefix = 0
-allsat=True
-
-for t in range(T+1):
-  print(t,"..")
-  constraint=True
-  for bot, route in llm_plan.items():
-    for u, (x_val, y_val) in enumerate(route):
-      if u==t: 
-        prefix_solver.assert_and_track(positions[(bot,t)][0] == x_val,Bool(f"{bot}_x_{t}_{x_val}"))
-        prefix_solver.assert_and_track(positions[(bot,t)][1] == y_val,Bool(f"{bot}_y_{t}_{y_val}"))
-        constraint=And(constraint,positions[(bot,t)][0] == x_val)
-        constraint=And(constraint,positions[(bot,t)][1] == y_val)
-  check=prefix_solver.check()
-  if check==unsat:
-    allsat=False
-
-  constraint=True
-  for (bot,u), (x,y) in positions.items():
-    if u==t:
-      prefix_solver.assert_and_track(And(x >= 0, x < N, y >= 0, y < N),Bool(f"{bot}_in_torus_{t}"))
-      constraint=And(constraint,x >= 0, x < N, y >= 0, y < N)
-  check=prefix_solver.check()
-  if check==unsat:
-      allsat=False
-
-  constraint=True
-  for bot, (xg,yg) in goal_positions.items():
-    if t>0:
-        x1, y1 = positions[(bot,t-1)]
-        x2, y2 = positions[(bot,t)]
+def save_plan_array(plan_file,llm_plan):
+  import numpy as np
+  if set(llm_plan)!=set(bots) or not is_ground(llm_plan):
+    raise ValueError("only a plan with a position for every bot of the scenario at every step has an array form")
+  routes = np.array([llm_plan[bot] for bot in bots])
+  if routes.size and (routes.min() < -2**15 or routes.max() >= 2**15):
+    raise ValueError("coordinates do not fit in int16")
+  with open(plan_file, 'wb') as g:
+    np.save(g,routes.astype(np.int16))
+
+def load_plan(plan_file):
+  # an .npy plan only saves the parsing: the validators index routes as lists, so the rows
+  # are copied out of the memory map (only batch_validate works on the array itself)
+  if plan_file.endswith('.npy'):
+    routes = load_plan_array(plan_file)
+    for bot in bots:
+      print(routes.shape[1])
+    return dict(zip(bots,routes.tolist()))
+
+  llm_plan = normalize_plan(read_plan_json(plan_file))
+
+  for bot in llm_plan:
+      plen=len(llm_plan[bot])
+      print(plen)
+
+  with open(plan_file+'.plot', 'w') as g:
+    json.dump(llm_plan,g,indent=2)
+  return llm_plan
+
+def scenario():
+  return {'N':N, 'bots':bots,
+          'start_positions':{bot:list(p) for bot,p in start_positions.items()},
+          'goal_positions':{bot:list(p) for bot,p in goal_positions.items()},
+          'obstacles':[list(o) for o in obstacles]}
+
+def use_scenario(sc):
+  global N, obstacles
+  N = sc['N']
+  bots[:] = sc['bots']
+  start_positions.clear()
+  start_positions.update((bot,tuple(p)) for bot,p in sc['start_positions'].items())
+  goal_positions.clear()
+  goal_positions.update((bot,tuple(p)) for bot,p in sc['goal_positions'].items())
+  obstacles = [tuple(o) for o in sc['obstacles']]
+
+def load_scenario(scenario_file):
+  # a JSON object with the keys of scenario(), those it leaves out keep their default
+  with open(scenario_file, 'r') as f:
+    use_scenario(dict(scenario(), **json.load(f)))
+
+def write_certificate(plan_file,llm_plan,longest_valid_prefix,sat):
+  # what was proven about a plan, so that its next revision can be validated against it
+  with open(plan_file+'.cert', 'w') as g:
+    json.dump({'scenario':scenario(), 'plan':llm_plan, 'sat':sat,
+               'longest_valid_prefix':longest_valid_prefix},g)
+
+def read_certificate(plan_file):
+  try:
+    with open(plan_file+'.cert', 'r') as f:
+      cert = json.load(f)
+  except (OSError, ValueError):
+    return None
+  if cert.get('scenario')!=scenario():
+    return None
+  return cert
+
+caches = {}   # cache file -> sqlite connection of the process
+
+def plan_key(llm_plan,engine='auto',encoding='int',minimize=0):
+  # content hash of a trimmed and padded plan with the scenario it is validated in,
+  # obstacles in any order, and the options that shape the reported core
+  import hashlib
+  sc = dict(scenario(), obstacles=sorted(scenario()['obstacles']))
+  options = {'engine':engine, 'encoding':encoding, 'minimize':minimize}
+  canonical = json.dumps({'scenario':sc, 'plan':llm_plan, 'options':options}, sort_keys=True, separators=(',',':'))
+  return hashlib.sha256(canonical.encode()).hexdigest()
+
+def result_cache(cache_file):
+  # Validation results of past plans, by plan_key, in an SQLite file that processes can share
+  if cache_file not in caches:
+    import sqlite3
+    db = sqlite3.connect(cache_file, timeout=30)
+    with db:
+      db.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT, used REAL)')
+      db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used)')
+    caches[cache_file] = db
+  return caches[cache_file]
+
+def cache_get(db,key):
+  row = db.execute('SELECT result FROM results WHERE key=?',(key,)).fetchone()
+  if row is None:
+    return None
+  with db:
+    db.execute('UPDATE results SET used=? WHERE key=?',(time.time(),key))
+  return json.loads(row[0])
+
+def cache_put(db,key,result,size):
+  # keeps the size most recently used results
+  with db:
+    db.execute('INSERT OR REPLACE INTO results VALUES (?,?,?)',(key,json.dumps(result),time.time()))
+    db.execute('DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used '
+               'LIMIT max(0,(SELECT count(*) FROM results)-?))',(size,))
+
+def result_of(T,longest_valid_prefix,failure):
+  # a failure without a core is a deadline reached at step t: the verdict is unknown
+  verdict = 'SAT' if failure is None else 'unknown' if failure[1] is None else 'UNSAT'
+  if verdict=='unknown':
+    longest_valid_prefix = max(failure[0]-1,0)
+  result = {'verdict':verdict, 'timesteps':T, 'longest_valid_prefix':longest_valid_prefix}
+  if failure is not None:
+    result['t'] = failure[0]
+  if verdict=='UNSAT':
+    result['core'] = [str(p) for p in failure[1]]
+  return result
+
+def diff_plan(llm_plan,cert):
+  # cells (bot,t) whose position is not the one proven in the certificate. A cell left
+  # free in either plan is never unchanged: the solver may place it anywhere in each.
+  base = cert['plan']
+  changed = set()
+  for bot in bots:
+    route = llm_plan.get(bot)
+    if route is None:
+      changed.update((bot,t) for t in range(len(next(iter(llm_plan.values())))))
+      continue
+    base_route = base.get(bot, [])
+    for t, pos in enumerate(route):
+      if t >= len(base_route) or base_route[t]!=pos or pinned_cell(route,t) is None or pinned_cell(base_route,t) is None:
+        changed.add((bot,t))
+  return changed
+
+def is_ground(llm_plan):
+  # a plan is ground when every bot of the twin has a literal (x,y) at every step:
+  # the tracked position assertions then pin every variable and no search is needed
+  if set(llm_plan)!=set(bots):
+    return False
+  for route in llm_plan.values():
+    for pos in route:
+      if not isinstance(pos,(list,tuple)) or len(pos)!=2:
+        return False
+      if not all(type(v) is int for v in pos):
+        return False
+  return True
+
+def ground_violations(llm_plan,T,proven=None):
+  # Decides the same formula as z3_validate, directly on the coordinates. Yields every
+  # violated tracked constraint as (t,name,cells), the cells (bot,u) it depends on, with
+  # families visited in solver assertion order, and (t,None,None) once step t is done.
+  # A cell a bot entered again is reported against the first time it was there (self-avoid),
+  # a cell another bot held is reported against every step it held it (mutual-avoid).
+  route = {bot:[tuple(pos) for pos in llm_plan[bot]] for bot in bots}
+
+  changed, proven_prefix = proven if proven is not None else (set(), -1)
+  def fresh(t,*cells):
+    return t > proven_prefix or any(c in changed for c in cells)
+
+  visited = {bot:{} for bot in bots}    # cell -> first step it was occupied (self-avoid)
+  occupants = {}                        # cell -> (bot rank, step) that occupied it (mutual-avoid)
+
+  for t in range(T+1):
+    for bot in bots:
+      x,y = route[bot][t]
+      if fresh(t,(bot,t)) and not (0 <= x < N and 0 <= y < N):
+        yield t, f"{bot}_in_torus_{t}", [(bot,t)]
+
+    for bot, (xg,yg) in goal_positions.items():
+      if t>0 and fresh(t,(bot,t-1),(bot,t)):
+        x1, y1 = route[bot][t-1]
+        x2, y2 = route[bot][t]
         dx = x2 - x1
         dy = y2 - y1
-        constraint=And(
-                       constraint,Or(
-                                     And(Or(dx == 1, dx == -(N-1)), dy == 0),
-                                     And(Or(dx == -1, dx == (N-1)), dy == 0),
-                                     And(Or(dy == 1, dy == -(N-1)), dx == 0),
-                                     And(Or(dy == -1, dy == (N-1)), dx == 0),
-                                     And(x1 == xg, y1 == yg, x2 == xg, y2 == yg)))
-        prefix_solver.assert_and_track(
-                Or(
-                And(Or(dx == 1, dx == -(N-1)), dy == 0), # right or wrap
-                And(Or(dx == -1, dx == (N-1)), dy == 0), # left or wrap
-                And(Or(dy == 1, dy == -(N-1)), dx == 0), # up or wrap
-                And(Or(dy == -1, dy == (N-1)), dx == 0), # down or wrap
-                And(x1 == xg, y1 == yg, x2 == xg, y2 == yg) # sit at goal
-            ),
-            Bool(f"{bot}_motion_law_ok_from_step_{t-1}_to_{t}")
-        )
-  check=prefix_solver.check()
-  if check==unsat:
-    allsat=False
-
-  constraint=True
-  for (bot,u), (x,y) in positions.items():
-    if u==t:
+        if not ((dx in (1,-(N-1),-1,N-1) and dy == 0) or
+                (dy in (1,-(N-1),-1,N-1) and dx == 0) or
+                (x1 == xg and y1 == yg and x2 == xg and y2 == yg)):
+          yield t, f"{bot}_motion_law_ok_from_step_{t-1}_to_{t}", [(bot,t-1),(bot,t)]
+
+    for bot in bots:
       for ox, oy in obstacles:
-        constraint=And(constraint,Or(x != ox, y != oy))
-        prefix_solver.assert_and_track(Or(x != ox, y != oy), Bool(f"{bot}_avoid_obstacle_{t}_{ox}_{oy}"))
-  check=prefix_solver.check()
-  if check==unsat:
-    allsat=False
-
-  constraint=True
-  for bot, (xg,yg) in goal_positions.items():
-    for t1 in range(t+1):
-        x1, y1 = positions[(bot,t1)]
-        for t2 in range(t1+1, t+1):
-            x2, y2 = positions[(bot,t2)]
-            prefix_solver.push()
-            constraint=And(constraint, Or(x1 != x2, y1 != y2,And(x1 == xg, y1 == yg, x2 == xg, y2 == yg)))
-            self_avoid_ok = Or(
-                x1 != x2, y1 != y2,
-                And(x1 == xg, y1 == yg, x2 == xg, y2 == yg)
-            )
-            prefix_solver.assert_and_track(self_avoid_ok, Bool(f"{bot}_{t}_self_avoid_{t1}_{t2}"))
-  check=prefix_solver.check()
-  if check==unsat:
-    allsat=False
-
-  constraint=True
-  for i, bot1 in enumerate(bots):
-    for t1 in range(t,t+1):
-        x1, y1 = positions[(bot1,t1)]
-        xg1, yg1 = goal_positions[bot1]
-        for bot2 in bots[i+1:]:
-            for t2 in range(t+1):
-              x2, y2 = positions[(bot2,t2)]
-              xg2, yg2 = goal_positions[bot2]
-              constraint=And(constraint,Or(
-                    x1 != x2, y1 != y2,
-                    And(x1 == xg1, y1 == yg1,
-                        x2 == xg2, y2 == yg2,
-                        t1 == t2)))
-              mutual_avoid_ok = Or(
-                    x1 != x2, y1 != y2,
-                    And(x1 == xg1, y1 == yg1,
-                        x2 == xg2, y2 == yg2,
-                        t1 == t2)  # must be same timestep
-              )
-              prefix_solver.assert_and_track(mutual_avoid_ok, Bool(f"{bot1}_{bot2}_mutual_avoid_{t1}_{t2}"))
-
-  check=prefix_solver.check()
-  if check==unsat:
-    allsat=False
-
-  if allsat:
-        longest_valid_prefix = t
+        if route[bot][t]==(ox,oy) and fresh(t,(bot,t)):
+          yield t, f"{bot}_avoid_obstacle_{t}_{ox}_{oy}", [(bot,t)]
+
+    for bot in bots:
+      cell = route[bot][t]
+      if cell in visited[bot] and cell!=goal_positions[bot]:
+        t1 = visited[bot][cell]
+        yield t, f"{bot}_{t}_self_avoid_{t1}_{t}", [(bot,t1),(bot,t)]
+      visited[bot].setdefault(cell,t)
+
+    for k, bot in enumerate(bots):
+      occupants.setdefault(route[bot][t],[]).append((k,t))
+    for i, bot1 in enumerate(bots):
+      cell = route[bot1][t]
+      hits = [(k,t2) for k,t2 in occupants[cell] if k>i and not
+              (cell==goal_positions[bot1] and cell==goal_positions[bots[k]] and t==t2)]
+      for k,t2 in sorted(hits):
+        yield t, f"{bot1}_{bots[k]}_mutual_avoid_{t}_{t2}", [(bot1,t),(bots[k],t2)]
+    yield t, None, None
+
+def ground_validate(llm_plan,T,proven=None,until=None):
+  # The first violated tracked constraint is reported together with the position
+  # literals it depends on. Like z3, a motion law is only reported when nothing else fails
+  # at its step: a bot that stays or jumps onto a cell it may not be on is reported for
+  # that cell. Past the deadline until (a time.time()), the step being checked is reported
+  # without a core: the verdict is unknown.
+  order = {bot:k for k,bot in enumerate(llm_plan)}
+  def core_of(name,cells):
+    core=[]
+    for bot,u in sorted(cells, key=lambda c:(c[1],order[c[0]])):
+      x_val,y_val = llm_plan[bot][u]
+      core += [f"{bot}_x_{u}_{x_val}", f"{bot}_y_{u}_{y_val}"]
+    return core+[name]
+
+  longest_valid_prefix = 0
+  started = -1
+  motion = None
+  for t, name, cells in ground_violations(llm_plan,T,proven):
+    if t>started:
+      if until is not None and time.time() > until:
+        return longest_valid_prefix, (t,None)
+      print(t,"..")
+      started = t
+    if name is not None and '_motion_law_' in name:
+      motion = motion or (name,cells)
+    elif name is not None:
+      return longest_valid_prefix, (t,core_of(name,cells))
+    elif motion is not None:
+      return longest_valid_prefix, (t,core_of(*motion))
+    else:
+      longest_valid_prefix = t
+  return longest_valid_prefix, None
+
+def ground_conflicts(llm_plan,T):
+  # every violated tracked constraint of the horizon, grouped per bot: {bot:[(t,name)]},
+  # a constraint between two bots is listed under both
+  conflicts = {}
+  for t, name, cells in ground_violations(llm_plan,T):
+    if name is not None:
+      for bot in dict.fromkeys(bot for bot,_ in cells):
+        conflicts.setdefault(bot,[]).append((t,name))
+  return {bot:conflicts[bot] for bot in bots if bot in conflicts}
+
+def dump_conflicts(conflicts):
+  count = len({c for found in conflicts.values() for c in found})
+  print(f"All conflicts: {count} constraints over {len(conflicts)} bots")
+  for bot, found in conflicts.items():
+    print(f"{bot}:")
+    for t, name in found:
+      print(f"  t={t}  {name}")
+
+def mutual_hit(code,at_goal,goal_code,i,j,t):
+  # the first step t2 <= t bot j is on the cell of bot i at step t, unless both sit on a
+  # shared goal at step t; code and at_goal are bots x steps, of one candidate
+  import numpy as np
+  on = np.flatnonzero(code[j,:t+1]==code[i,t])
+  if len(on)==0 or (on[0]==t and at_goal[i,t] and at_goal[j,t] and goal_code[i]==goal_code[j]):
+    return None
+  return int(on[0])
+
+def batch_validate(plans):
+  # K candidate plans at once, on a K x bots x steps x 2 array: the families of
+  # ground_violations are computed as boolean K x bots x steps masks, and each candidate
+  # reports the constraint ground_validate would, by name only (no position literals). plans is a list of plan objects, trimmed and padded as validate_plan does,
+  # or such an array already in scenario bot order. Returns one result per candidate,
+  # {'verdict','timesteps','longest_valid_prefix'} with 't' and 'name' on UNSAT.
+  import numpy as np
+  if isinstance(plans,np.ndarray):
+    if plans.ndim!=4 or plans.shape[1]!=len(bots) or plans.shape[3]!=2:
+      raise ValueError(f"expected a K x {len(bots)} x steps x 2 array, got {plans.shape}")
+    routes = plans.astype(np.int64)
+    horizons = np.full(len(routes),routes.shape[2]-1)
+  else:
+    arrays = []
+    for plan in plans:
+      llm_plan = normalize_plan({bot:dict(route) if isinstance(route,dict) else list(route) for bot,route in plan.items()})
+      # what is_ground checks cell by cell: numpy only infers an int array from int pairs
+      routes = np.array([llm_plan[bot] for bot in bots]) if set(llm_plan)==set(bots) else None
+      if routes is None or routes.dtype.kind!='i' or routes.ndim!=3 or routes.shape[2]!=2:
+        raise ValueError("batch validation needs a position for every bot of the scenario at every step")
+      arrays.append(routes)
+    horizons = np.array([routes.shape[1]-1 for routes in arrays])
+    L = horizons.max()+1
+    routes = np.stack([np.pad(routes,((0,0),(0,L-routes.shape[1]),(0,0)),mode='edge') for routes in arrays]).astype(np.int64)
+  K, B, L = routes.shape[:3]
+  x, y = routes[...,0], routes[...,1]
+  steps = np.arange(L)
+  goal = np.array([goal_positions[bot] for bot in bots]).reshape(B,2)
+  at_goal = (x==goal[None,:,0,None]) & (y==goal[None,:,1,None])
+  flags = np.zeros((5,K,B,L),dtype=bool)   # in_torus, motion law, obstacle, self-avoid, mutual-avoid
+
+  flags[0] = (x<0) | (x>=N) | (y<0) | (y>=N)
+  dx, dy = np.diff(x,axis=2), np.diff(y,axis=2)
+  unit = (1,-1,N-1,-(N-1))
+  flags[1][...,1:] = ~((np.isin(dx,unit) & (dy==0)) | (np.isin(dy,unit) & (dx==0)) |
+                       (at_goal[...,1:] & at_goal[...,:-1]))
+  if len(obstacles):
+    obs = np.array(obstacles).reshape(-1,2)
+    flags[2] = ((x[...,None]==obs[:,0]) & (y[...,None]==obs[:,1])).any(axis=-1)
+
+  # cells as codes, those out of the torus share one: they fail in_torus first anyway
+  code = np.where(flags[0],N*N,x*N+y)
+  goal_code = goal[:,0]*N+goal[:,1]
+  # a repeated cell is a later occurrence in a stable sort of each route by cell
+  order = np.argsort(code,axis=2,kind='stable')
+  by_cell = np.take_along_axis(code,order,axis=2)
+  repeat = np.zeros_like(flags[3])
+  repeat[...,1:] = (by_cell[...,1:]==by_cell[...,:-1]) & (by_cell[...,1:]!=goal_code[None,:,None])
+  np.put_along_axis(flags[3],order,repeat,axis=2)
+
+  # Mutual avoidance: bot i at step t hits a later-ranked bot when the highest rank on the
+  # cell up to step t, that step included, is above i. Occupations (k,bot,t) are sorted by
+  # candidate, cell and step, and the highest rank is a running max within each cell.
+  shape = code.shape
+  rank = np.broadcast_to(np.arange(B)[None,:,None],shape).ravel()
+  when = np.broadcast_to(steps,shape).ravel()
+  group = (np.arange(K)[:,None,None]*(N*N+1)+code).ravel()
+  order = np.lexsort((when,group))
+  group, when, rank = group[order], when[order], rank[order]
+  gid = np.cumsum(np.r_[True,group[1:]!=group[:-1]])
+  highest = np.maximum.accumulate(gid*B+rank)-gid*B
+  # the occupations of a step are simultaneous: each takes the max at the last of them
+  last = np.flatnonzero(np.r_[(group[1:]!=group[:-1]) | (when[1:]!=when[:-1]),True])
+  highest = highest[last[np.searchsorted(last,np.arange(len(order)))]]
+  hit = np.empty(len(order),dtype=bool)
+  hit[order] = highest > rank
+  flags[4] = hit.reshape(shape)
+  if len(set(goal_code.tolist()))<B:
+    # bots sharing a goal may both sit on it at the same step: those hits are rechecked
+    for k, i, t in zip(*np.nonzero(flags[4] & at_goal)):
+      flags[4][k,i,t] = any(mutual_hit(code[k],at_goal[k],goal_code,i,j,t) is not None for j in range(i+1,B))
+
+  flags &= (steps[None,:] <= horizons[:,None])[None,:,None,:]
+  failing = flags.any(axis=(0,2))
+  results = []
+  for k in range(K):
+    T = int(horizons[k])
+    if not failing[k].any():
+      results.append({'verdict':'SAT', 'timesteps':T, 'longest_valid_prefix':T})
+      continue
+    t = int(np.argmax(failing[k]))
+    # the motion law last, as ground_validate
+    prefer = [0,2,3,4,1]
+    family = prefer[int(np.argmax(flags[prefer,k,:,t].any(axis=1)))]
+    i = int(np.argmax(flags[family,k,:,t]))
+    bot, cell = bots[i], tuple(routes[k,i,t])
+    if family==0:
+      name = f"{bot}_in_torus_{t}"
+    elif family==1:
+      name = f"{bot}_motion_law_ok_from_step_{t-1}_to_{t}"
+    elif family==2:
+      ox, oy = next(o for o in obstacles if tuple(o)==cell)
+      name = f"{bot}_avoid_obstacle_{t}_{ox}_{oy}"
+    elif family==3:
+      t1 = int(np.argmax(code[k,i,:t]==code[k,i,t]))
+      name = f"{bot}_{t}_self_avoid_{t1}_{t}"
+    else:
+      j, t2 = next((j,t2) for j in range(i+1,B) for t2 in [mutual_hit(code[k],at_goal[k],goal_code,i,j,t)] if t2 is not None)
+      name = f"{bot}_{bots[j]}_mutual_avoid_{t}_{t2}"
+    results.append({'verdict':'UNSAT', 'timesteps':T, 'longest_valid_prefix':max(t-1,0), 't':t, 'name':name})
+  return results
+
+def read_batch(plan_files):
+  # names and candidates for batch_validate: JSON or .npy plans, or a single K x bots x
+  # steps x 2 .npy batch, returned as the array itself
+  if len(plan_files)==1 and plan_files[0].endswith('.npy'):
+    import numpy as np
+    routes = np.load(plan_files[0])
+    if routes.ndim==4:
+      return [f"{plan_files[0]}[{k}]" for k in range(len(routes))], routes
+  plans = []
+  for plan_file in plan_files:
+    if plan_file.endswith('.npy'):
+      import numpy as np
+      plans.append(dict(zip(bots,np.load(plan_file).tolist())))
+    else:
+      plans.append(read_plan_json(plan_file))
+  return plan_files, plans
+
+def detour(llm_plan,bot,anchor,T,window):
+  # Time-expanded BFS for a new sub-path of bot from its cell at step anchor, joining its
+  # own route again at a later step (or reaching its goal and waiting there) within
+  # 2*window steps. Cells stay in the torus, off obstacles and off the bot's own earlier
+  # cells; another bot's cell is blocked from the first time a later-ranked bot was there
+  # and until the last time an earlier-ranked one was there, as mutual-avoid requires.
+  # Returns the spliced route or None.
+  route = [tuple(p) for p in llm_plan[bot]]
+  goal = goal_positions[bot]
+  rank = {b:k for k,b in enumerate(bots)}
+  first, last = {}, {}
+  for other in bots:
+    if other==bot:
+      continue
+    for u, p in enumerate(llm_plan[other]):
+      cell = tuple(p)
+      if rank[other]>rank[bot]:
+        first[cell] = min(first.get(cell,u),u)
+      else:
+        last[cell] = max(last.get(cell,u),u)
+  blocked_cells = {tuple(o) for o in obstacles} | set(route[:anchor])
+  def free(cell,u):
+    return (cell not in blocked_cells and first.get(cell,T+1) > u and last.get(cell,-1) < u)
+
+  def splice(layers,cell,u):
+    path = [cell]
+    for layer in reversed(layers[1:]):
+      cell = layer[cell]
+      path.append(cell)
+    return route[:anchor]+path[::-1]
+
+  layers = [{route[anchor]:None}]
+  for u in range(anchor+1,min(T,anchor+2*window)+1):
+    layer = {}
+    for cell in layers[-1]:
+      x, y = cell
+      moves = [((x+1)%N,y), ((x-1)%N,y), (x,(y+1)%N), (x,(y-1)%N)]+([cell] if cell==goal else [])
+      for step in moves:
+        if step not in layer and free(step,u):
+          layer[step] = cell
+    if not layer:
+      return None
+    layers.append(layer)
+    # rejoin the route, or wait at the goal until the horizon
+    targets = []
+    if u<T and route[u] in layer:
+      targets.append((route[u],route[u+1:]))
+    if goal in layer and all(free(goal,v) for v in range(u+1,T+1)):
+      targets.append((goal,[goal]*(T-u)))
+    if u==T and route[T] in layer:
+      targets.append((route[T],[]))
+    for cell, rest in targets:
+      new = splice(layers,cell,u)+list(rest)
+      visits = [c for c in new if c!=goal]
+      if len(set(visits))==len(visits):
+        return [list(c) for c in new]
+  return None
+
+def repair(llm_plan,T,failure,rounds=10,window=6):
+  # Local repair of a ground plan: the bots of the failing constraint get a detour from a
+  # step before the failure, starting with the closest one, and the plan is revalidated.
+  # A repair is kept when the plan then fails later, or not at all.
+  # Returns the plan, its longest valid prefix, its failure (None when repaired) and the
+  # repairs made as (bot,anchor,t).
+  plan = {bot:[list(p) for p in route] for bot,route in llm_plan.items()}
+  longest_valid_prefix = failure[0]-1
+  done = []
+  for _ in range(rounds):
+    t, core = failure
+    name = str(core[-1])
+    involved = [bot for bot in bots if name.startswith(bot+'_') or f"_{bot}_mutual_avoid" in name]
+    found = False
+    for bot in reversed(involved):
+      for anchor in range(t-1,max(t-1-window,0)-1,-1):
+        route = detour(plan,bot,anchor,T,window)
+        if route is None:
+          continue
+        trial = dict(plan,**{bot:route})
+        with contextlib.redirect_stdout(io.StringIO()):
+          prefix, trial_failure = ground_validate(trial,T)
+        if trial_failure is None or trial_failure[0]>t:
+          plan, longest_valid_prefix, failure = trial, prefix, trial_failure
+          done.append((bot,anchor,t))
+          found = True
+          break
+      if found:
+        break
+    if not found or failure is None:
+      break
+  return plan, longest_valid_prefix, failure, done
+
+def torus_distance(a,b):
+  dx, dy = abs(a[0]-b[0]), abs(a[1]-b[1])
+  return min(dx,N-dx)+min(dy,N-dy)
+
+def space_time_astar(bot,limits,T):
+  # Shortest route of bot from its start to its goal within T steps, then sitting at the
+  # goal until T. The bot moves every step (it may only wait at its goal), never enters a
+  # cell twice, stays off obstacles and off the cells of limits over their forbidden step
+  # ranges {cell:[(lo,hi)]}. A state is (cell,step) and the first route reaching it is kept,
+  # which can miss a route needing a longer prefix to get clear of its own trail.
+  # Returns the route, T+1 cells long, or None.
+  start, goal = start_positions[bot], goal_positions[bot]
+  def forbidden(cell,lo,hi):
+    return any(a <= hi and b >= lo for a,b in limits.get(cell,()))
+  blocked = {tuple(o) for o in obstacles}
+  if start in blocked or forbidden(start,0,0):
+    return None
+  parent = {(start,0):None}
+  frontier = [(torus_distance(start,goal),0,start)]
+  while frontier:
+    _, u, cell = heapq.heappop(frontier)
+    u = -u
+    trail = []
+    state = (cell,u)
+    while state is not None:
+      trail.append(state[0])
+      state = parent[state]
+    if cell==goal and not forbidden(goal,u,T):
+      return [list(c) for c in trail[::-1]]+[list(goal)]*(T-u)
+    if u==T:
+      continue
+    x, y = cell
+    for step in [((x+1)%N,y), ((x-1)%N,y), (x,(y+1)%N), (x,(y-1)%N)]:
+      if (step,u+1) in parent or step in blocked or forbidden(step,u+1,u+1):
+        continue
+      if step in trail and step!=goal:
+        continue
+      parent[(step,u+1)] = (cell,u)
+      heapq.heappush(frontier,(u+1+torus_distance(step,goal),-(u+1),step))
+  return None
+
+def start_limits(T):
+  # a bot at its start at t=0 tethers the cell against every earlier bot for good
+  return {bot:{start_positions[other]:[(0,T)] for other in bots[k+1:]} for k,bot in enumerate(bots)}
+
+def prioritized_plan(T):
+  # Space-time A* bot by bot in rank order. Mutual avoidance binds a bot to the earlier
+  # ones only (it may not enter a cell up to the last step they are on it), and an earlier
+  # bot to the start cells of the later ones: in this order every route is planned knowing
+  # all of its constraints, but an earlier route can leave no way for a later bot.
+  # Returns the plan, or None and the first bot without a route.
+  limits = {}
+  plan = {}
+  for bot, own in start_limits(T).items():
+    for cell, ranges in limits.items():
+      own[cell] = own.get(cell,[])+ranges
+    route = space_time_astar(bot,own,T)
+    if route is None:
+      return None, bot
+    plan[bot] = route
+    last = {tuple(cell):u for u,cell in enumerate(route)}
+    for cell, u in last.items():
+      limits.setdefault(cell,[]).append((0,u))
+  return plan, None
+
+def cbs_plan(T,budget=1000):
+  # Conflict-based search over space_time_astar. Routes are planned independently, then
+  # the first violation of the joint plan splits the search in two.
+  # Mutual avoidance of bot1 at t against bot2 at t2 <= t holds when bot1 stays off the
+  # cell from t2 on, or when bot2 stays off it up to t: each branch forbids one of them.
+  # Nodes are expanded by sum of arrival steps. Returns the plan (routes T+1 cells long)
+  # and the nodes expanded, the plan is None when budget nodes did not solve it.
+  def arrival(bot,route):
+    u = T
+    while u>0 and tuple(route[u-1])==goal_positions[bot]:
+      u -= 1
+    return u
+  limits = start_limits(T)
+  plan = {bot:space_time_astar(bot,limits[bot],T) for bot in bots}
+  if any(route is None for route in plan.values()):
+    return None, 0
+  count, pushed = 0, 0
+  frontier = [(sum(arrival(bot,plan[bot]) for bot in bots),pushed,limits,plan)]
+  while frontier and count < budget:
+    _, _, limits, plan = heapq.heappop(frontier)
+    count += 1
+    conflict = next(((name,cells) for _,name,cells in ground_violations(plan,T) if name is not None), None)
+    if conflict is None:
+      return plan, count
+    name, cells = conflict
+    if '_mutual_avoid_' not in name:
+      continue    # the low level never breaks a single bot's constraints
+    (bot1,t), (bot2,t2) = cells
+    cell = tuple(plan[bot1][t])
+    for bot, lo, hi in ((bot1,t2,T),(bot2,0,t)):
+      branch = dict(limits, **{bot:{**limits[bot], cell:limits[bot].get(cell,[])+[(lo,hi)]}})
+      route = space_time_astar(bot,branch[bot],T)
+      if route is None:
+        continue
+      routes = dict(plan, **{bot:route})
+      pushed += 1
+      heapq.heappush(frontier,(sum(arrival(b,routes[b]) for b in bots),pushed,branch,routes))
+  return None, count
+
+def reference_plan(T=None,budget=1000):
+  # A plan for the scenario without the LLM: the prioritized pass, then conflict-based
+  # search within budget nodes when a bot was left without a route. T defaults to twice
+  # the longest start to goal distance. Returns the (trimmed) plan or None, the planner
+  # that settled it and the search nodes expanded.
+  if T is None:
+    T = max(2*max(torus_distance(start_positions[bot],goal_positions[bot]) for bot in bots),1)
+  plan, _ = prioritized_plan(T)
+  if plan is not None:
+    return normalize_plan(plan), 'prioritized', 0
+  plan, nodes = cbs_plan(T,budget)
+  return (normalize_plan(plan) if plan is not None else None), 'cbs', nodes
+
+def bv_width():
+  return max(N-1,1).bit_length()
+
+def fits_bv(llm_plan):
+  # bit-vector literals wrap modulo 2**width: a coordinate outside of it would alias a cell
+  limit = 2**bv_width()
+  values = [v for route in llm_plan.values() for pos in route if pos is not None for v in pos if v is not None]
+  values += [v for o in obstacles for v in o]
+  return all(0 <= v < limit for v in values)
+
+# encoding='bv' makes coordinates bit-vectors of bv_width() bits: bounds are unsigned
+# comparisons and moves wrap for free when N is a power of two
+def coordinate(name,encoding='int'):
+  return BitVec(name,bv_width()) if encoding=='bv' else Int(name)
+
+def in_torus(x,y,encoding='int'):
+  if encoding=='bv':
+    # every bit-vector of width bits is a cell when N is 2**width (N itself would be 0)
+    if N==2**bv_width():
+      return BoolVal(True)
+    return And(ULT(x,N), ULT(y,N))
+  return And(x >= 0, x < N, y >= 0, y < N)
+
+def motion_law(x1,y1,x2,y2,xg,yg,encoding='int'):
+  if encoding=='bv':
+    width = bv_width()
+    succ = (lambda v: v+1) if N==2**width else (lambda v: If(v == N-1, 0, v+1))
+    pred = (lambda v: v-1) if N==2**width else (lambda v: If(v == 0, N-1, v-1))
+    return Or(
+        And(Or(x2 == succ(x1), x2 == pred(x1)), y2 == y1), # right or left, wrapping
+        And(Or(y2 == succ(y1), y2 == pred(y1)), x2 == x1), # up or down, wrapping
+        And(x1 == xg, y1 == yg, x2 == xg, y2 == yg) # sit at goal
+    )
+  dx = x2 - x1
+  dy = y2 - y1
+  return Or(
+      And(Or(dx == 1, dx == -(N-1)), dy == 0), # right or wrap
+      And(Or(dx == -1, dx == (N-1)), dy == 0), # left or wrap
+      And(Or(dy == 1, dy == -(N-1)), dx == 0), # up or wrap
+      And(Or(dy == -1, dy == (N-1)), dx == 0), # down or wrap
+      And(x1 == xg, y1 == yg, x2 == xg, y2 == yg) # sit at goal
+  )
+
+def self_avoid(x1,y1,x2,y2,xg,yg):
+  return Or(
+      x1 != x2, y1 != y2,
+      And(x1 == xg, y1 == yg, x2 == xg, y2 == yg)
+  )
+
+def mutual_avoid(x1,y1,xg1,yg1,t1,x2,y2,xg2,yg2,t2):
+  return Or(
+      x1 != x2, y1 != y2,
+      And(x1 == xg1, y1 == yg1,
+          x2 == xg2, y2 == yg2,
+          t1 == t2)  # must be same timestep
+  )
+
+def mutual_pairs(llm_plan):
+  # Mutual avoidance only needs the pairs that can share a cell: pinned cells are indexed
+  # by position as timesteps come in, cells left free by the plan can meet anything.
+  # pairs(t) lists the (bot1,bot2,t2) to constrain against bot1 at step t, in assertion order.
+  rank = {bot:k for k,bot in enumerate(bots)}
+  occupants = {}      # cell -> pinned (bot,t) that occupy it
+  cell_of = {}        # pinned (bot,t) -> cell
+  free_cells = set()  # (bot,t) without a position in the plan
+  indexed = []
+  def pairs(t):
+    for u in range(len(indexed),t+1):
+      for bot in bots:
+        cell = pinned_cell(llm_plan.get(bot,[]),u)
+        if cell is None:
+          free_cells.add((bot,u))
+          continue
+        cell_of[(bot,u)] = cell
+        occupants.setdefault(cell,set()).add((bot,u))
+      indexed.append(u)
+    found = []
+    for i, bot1 in enumerate(bots):
+      cell = cell_of.get((bot1,t))
+      if cell is None:
+        others = [(bot2,t2) for bot2 in bots[i+1:] for t2 in range(t+1)]
+      else:
+        others = sorted((c for c in occupants[cell]|free_cells if rank[c[0]]>i and c[1]<=t),
+                        key=lambda c:(rank[c[0]],c[1]))
+      found += [(bot1,bot2,t2) for bot2,t2 in others]
+    return found
+  return pairs
+
+PROFILE_FIELDS = ['job','t','family','assertions','build_s','check_s','checks','conflicts','decisions','memory_mb']
+
+def profile_row(t,family):
+  # assertions added and time spent building them, then time in check() and Z3's statistics
+  # after it: families are checked on their own with --check-block 0, otherwise the
+  # 'check' row of a step holds the check of its block
+  return {'job':'', 't':t, 'family':family, 'assertions':0, 'build_s':0.0, 'check_s':0.0,
+          'checks':0, 'conflicts':0, 'decisions':0, 'memory_mb':0}
+
+def write_profile(profile_file,profile):
+  profile = [{k:round(v,6) if type(v) is float else v for k,v in r.items()} for r in profile]
+  with open(profile_file, 'w', newline='') as g:
+    if profile_file.endswith('.csv'):
+      writer = csv.DictWriter(g,PROFILE_FIELDS)
+      writer.writeheader()
+      writer.writerows(profile)
+    else:
+      json.dump(profile,g,indent=1)
+
+def dump_profile(profile):
+  # totals per family, then per timestep: where the cost is and where it starts growing
+  def totals(key):
+    rows = {}
+    for r in profile:
+      total = rows.setdefault(r[key],dict(profile_row(r['t'],r['family']),memory_mb=0))
+      for field in ('assertions','build_s','check_s','checks','conflicts','decisions'):
+        total[field] += r[field]
+      total['memory_mb'] = max(total['memory_mb'],r['memory_mb'])
+    return rows
+  header = f"{'assertions':>10} {'build s':>9} {'check s':>9} {'checks':>6} {'conflicts':>9} {'decisions':>9} {'memory MB':>9}"
+  line = lambda r: f"{r['assertions']:>10} {r['build_s']:>9.3f} {r['check_s']:>9.3f} {r['checks']:>6} {r['conflicts']:>9} {r['decisions']:>9} {r['memory_mb']:>9.1f}"
+  print(f"{'family':<12} "+header)
+  for name, r in totals('family').items():
+    print(f"{name:<12} "+line(r))
+  print()
+  print(f"{'t':>12} "+header)
+  for t, r in sorted(totals('t').items()):
+    print(f"{t:>12} "+line(r))
+  print()
+
+minimized = {}   # conflict set -> minimal core, shared by every plan validated in the process
+MINIMIZED = 4096 # conflict sets kept, least recently used ones dropped first
+
+def minimize_core(core,terms,budget):
+  # Deletion-based shrinking of an UNSAT core: each tracked literal is dropped in turn and
+  # stays out when the others are still UNSAT, which then shrink to their own core. Only
+  # the core's constraints are involved, never the rest of the prefix. Once budget seconds
+  # are spent the smallest core found so far is returned, and not cached.
+  key = frozenset(str(p) for p in core)
+  if key in minimized:
+    minimized[key] = minimized.pop(key)
+    return [p for p in core if str(p) in minimized[key]]
+  deadline = time.perf_counter()+budget
+  s = Solver()
+  s.set('core.minimize', True)
+  for name in key:
+    term, literal = terms[name]
+    s.add(Implies(literal, term))
+  kept = [str(p) for p in core]
+  for name in list(kept):
+    left = deadline-time.perf_counter()
+    if left <= 0:
+      return [p for p in core if str(p) in kept]
+    if name not in kept:
+      continue
+    s.set('timeout', max(int(left*1000),1))
+    rest = [k for k in kept if k!=name]
+    if s.check(*[terms[k][1] for k in rest])==unsat:
+      smaller = {str(k) for k in s.unsat_core()}
+      kept = [k for k in rest if k in smaller]
+  minimized[key] = set(kept)
+  if len(minimized) > MINIMIZED:
+    del minimized[next(iter(minimized))]
+  return [p for p in core if str(p) in minimized[key]]
+
+def self_pairs(llm_plan):
+  # Self avoidance of step t only needs the earlier steps the bot can have been on the same
+  # cell: those the plan pins to it (unless it is the goal, where the bot may wait), or any
+  # step when either cell is left free. pairs(bot,t) lists these t1 < t in increasing order.
+  visits = {bot:{} for bot in bots}   # bot -> pinned cell -> steps on it
+  free = {bot:[] for bot in bots}     # bot -> steps without a position in the plan
+  indexed = []
+  def pairs(bot,t):
+    for u in range(len(indexed),t+1):
+      for b in bots:
+        cell = pinned_cell(llm_plan.get(b,[]),u)
+        if cell is None:
+          free[b].append(u)
+        else:
+          visits[b].setdefault(cell,[]).append(u)
+      indexed.append(u)
+    cell = pinned_cell(llm_plan.get(bot,[]),t)
+    if cell is None:
+      return range(t)
+    pinned = [u for u in visits[bot][cell] if u<t] if cell!=goal_positions[bot] else []
+    return sorted(pinned+[u for u in free[bot] if u<t])
+  return pairs
+
+def check_budget(until,check_timeout=None):
+  # milliseconds a z3 check() may run: up to the deadline until (a time.time()) and at
+  # most check_timeout seconds. TimeoutError once the deadline is past.
+  budget = [] if check_timeout is None else [check_timeout]
+  if until is not None:
+    remaining = until-time.time()
+    if remaining <= 0:
+      raise TimeoutError("deadline reached")
+    budget.append(remaining)
+  return max(1,int(1000*min(budget))) if budget else 4294967295    # z3: no timeout
+
+def z3_validate(llm_plan,T,proven=None,block=1,prefix_solver=None,encoding='int',local_bots=None,bound=None,template=None,profile=None,minimize=0,
+                completion=None,until=None,check_timeout=None):
+  # Every tracked constraint is fully determined by the name that tracks it, so terms are
+  # built once per name. With a template (see z3_template) that cache outlives the call and
+  # a plan only builds the terms no earlier plan of the scenario needed.
+  if template is None:
+    template = {'positions':{}, 'terms':{}}
+  positions, terms = template['positions'], template['terms']    # positions[bot][t] = (x,y)
+  for bot in bots:
+      cells = positions.setdefault(bot,[])
+      for t in range(len(cells),T+1):
+          cells.append((coordinate(f"x_{bot}_{t}",encoding), coordinate(f"y_{bot}_{t}",encoding)))
+
+  # with a baseline certificate, constraints of the proven prefix that only involve
+  # unchanged cells hold already and are neither asserted nor re-checked
+  changed, proven_prefix = proven if proven is not None else (set(), -1)
+  def fresh(t,*cells):
+    return t > proven_prefix or any(c in changed for c in cells)
+
+  # bot-local families (torus, motion, obstacles, self-avoid) are only asserted for
+  # local_bots, the coupled mutual-avoid family always covers every bot
+  local = set(bots if local_bots is None else local_bots)
+
+  if prefix_solver is None:
+    prefix_solver = Solver()
+    prefix_solver.set('core.minimize', True)
+
+  pairs = mutual_pairs(llm_plan)
+  earlier = self_pairs(llm_plan)
+
+  # profile, when given, collects one row per timestep and constraint family (see profile_row)
+  row = profile_row(None,None)
+  counters = {'conflicts':0, 'decisions':0}
+  def family(t,name):
+    nonlocal row
+    row = profile_row(t,name)
+    if profile is not None:
+      profile.append(row)
+
+  tracked = {}    # tracked literal -> assertion order, cores are reported in that order
+  def track(build,name):
+    if profile is not None:
+      start = time.perf_counter()
+    tracked.setdefault(name,len(tracked))
+    if name not in terms:
+      terms[name] = (build(), Bool(name))
+    prefix_solver.assert_and_track(*terms[name])
+    if profile is not None:
+      row['assertions'] += 1
+      row['build_s'] += time.perf_counter()-start
+
+  # past the deadline, or when a check gives up, TimeoutError stops the validation: the
+  # step being worked on is reported without a core
+  limited = until is not None or check_timeout is not None
+  def check():
+    if limited:
+      prefix_solver.set('timeout',check_budget(until,check_timeout))
+    if profile is None:
+      result = prefix_solver.check()
+      if result==unknown:
+        raise TimeoutError(prefix_solver.reason_unknown())
+      return result
+    start = time.perf_counter()
+    result = prefix_solver.check()
+    row['check_s'] += time.perf_counter()-start
+    row['checks'] += 1
+    # the solver's counters add up over its checks, rows hold what each check added
+    stats = prefix_solver.statistics()
+    for counter in ('conflicts','decisions'):
+      total = sum(stats.get_key_value(key) for key in stats.keys() if key.endswith(counter))
+      row[counter] += total-counters[counter] if total>=counters[counter] else total
+      counters[counter] = total
+    row['memory_mb'] = stats.get_key_value('memory') if 'memory' in stats.keys() else 0
+    if result==unknown:
+      raise TimeoutError(prefix_solver.reason_unknown())
+    return result
+
+  # block=0 checks after every constraint family (the original schedule), block=k
+  # asserts k whole timesteps and checks once, bisecting back when they are UNSAT
+  allsat=True
+  def check_family(pending):
+    nonlocal allsat
+    if block==0 and pending:
+      if check()==unsat:
+        allsat=False
+
+  def assert_step(t):
+    pending=fresh(t)
+    family(t,'positions')
+    for bot, route in llm_plan.items():
+      if t < len(route) and route[t] is not None:
+          x_val, y_val = route[t]
+          x, y = positions[bot][t]
+          if x_val is not None:
+            track(lambda: x == x_val,f"{bot}_x_{t}_{x_val}")
+          if y_val is not None:
+            track(lambda: y == y_val,f"{bot}_y_{t}_{y_val}")
+    check_family(pending)
+    asserted=pending
+
+    pending=False
+    family(t,'in_torus')
+    for bot in bots:
+      if bot in local and fresh(t,(bot,t)):
+        x, y = positions[bot][t]
+        track(lambda: in_torus(x,y,encoding),f"{bot}_in_torus_{t}")
+        pending=True
+    check_family(pending)
+    asserted|=pending
+
+    pending=False
+    family(t,'motion_law')
+    for bot, (xg,yg) in goal_positions.items():
+      if t>0 and bot in local and fresh(t,(bot,t-1),(bot,t)):
+          x1, y1 = positions[bot][t-1]
+          x2, y2 = positions[bot][t]
+          track(lambda: motion_law(x1,y1,x2,y2,xg,yg,encoding),f"{bot}_motion_law_ok_from_step_{t-1}_to_{t}")
+          pending=True
+    check_family(pending)
+    asserted|=pending
+
+    pending=False
+    family(t,'obstacles')
+    for bot in bots:
+      if bot in local and fresh(t,(bot,t)):
+        x, y = positions[bot][t]
+        for ox, oy in obstacles:
+          track(lambda: Or(x != ox, y != oy),f"{bot}_avoid_obstacle_{t}_{ox}_{oy}")
+          pending=True
+    check_family(pending)
+    asserted|=pending
+
+    pending=False
+    family(t,'self_avoid')
+    # pairs (t1,t2) with t2 < t were asserted at step t2, only those ending at t are new
+    for bot, (xg,yg) in goal_positions.items():
+      if bot not in local:
+        continue
+      x2, y2 = positions[bot][t]
+      for t1 in earlier(bot,t):
+          if not fresh(t,(bot,t1),(bot,t)):
+            continue
+          x1, y1 = positions[bot][t1]
+          track(lambda: self_avoid(x1,y1,x2,y2,xg,yg),f"{bot}_{t}_self_avoid_{t1}_{t}")
+          pending=True
+    check_family(pending)
+    asserted|=pending
+
+    pending=False
+    family(t,'mutual_avoid')
+    t1 = t
+    for bot1, bot2, t2 in pairs(t):
+          if not fresh(t,(bot1,t1),(bot2,t2)):
+            continue
+          x1, y1 = positions[bot1][t1]
+          xg1, yg1 = goal_positions[bot1]
+          x2, y2 = positions[bot2][t2]
+          xg2, yg2 = goal_positions[bot2]
+          track(lambda: mutual_avoid(x1,y1,xg1,yg1,t1,x2,y2,xg2,yg2,t2),f"{bot1}_{bot2}_mutual_avoid_{t1}_{t2}")
+          pending=True
+    check_family(pending)
+    asserted|=pending
+    return asserted
+
+  def check_steps(steps):
+    # asserts steps on top of a SAT prefix, returns True when they are SAT as well
+    nonlocal allsat
+    allsat=True
+    asserted=False
+    if limited:
+      check_budget(until)
+    for t in steps:
+      asserted|=assert_step(t)
+    if block>0 and asserted:
+      family(steps[-1],'check')
+      if check()==unsat:
+        allsat=False
+    return allsat
+
+  def locate(steps):
+    # steps are UNSAT on top of a SAT prefix: bisect down to the first failing one,
+    # whose check sees exactly the assertions the per-family schedule ended that step with
+    nonlocal longest_valid_prefix, working
+    while len(steps)>1:
+      half = steps[:len(steps)//2]
+      depth = prefix_solver.num_scopes()
+      prefix_solver.push()
+      if check_steps(half):
+        for t in half:
+          print(t,"..")
+        longest_valid_prefix = half[-1]
+        steps = steps[len(half):]
+        working = steps[0]
+      else:
+        prefix_solver.pop(prefix_solver.num_scopes()-depth)
+        steps = half
+    check_steps(steps)
+    return steps[0]
+
+  # bound() is the last timestep worth checking, when another job found an earlier failure
+  longest_valid_prefix = 0
+  working = 0     # the first step not proven yet
+  try:
+    for t0 in range(0,T+1,max(block,1)):
+      if bound is not None and t0 > bound():
+        break
+      steps = list(range(t0,min(t0+max(block,1),T+1)))
+      working = t0
+      depth = prefix_solver.num_scopes()
+      if len(steps)>1:
+        prefix_solver.push()
+      if not check_steps(steps):
+        if len(steps)>1:
+          prefix_solver.pop(prefix_solver.num_scopes()-depth)
+          steps = [locate(steps)]
+        print(steps[0],"..")
+        core = sorted(prefix_solver.unsat_core(), key=lambda p: tracked[str(p)])
+        if minimize:
+          core = minimize_core(core,terms,minimize)
+        return longest_valid_prefix, (steps[0],core)
+      for t in steps:
+        print(t,"..")
+      longest_valid_prefix = steps[-1]
+  except TimeoutError:
+    return longest_valid_prefix, (working,None)
+  # completion, when given, receives the cells the solver chose for the whole plan
+  if completion is not None and prefix_solver.check()==sat:
+    model = prefix_solver.model()
+    for bot in bots:
+      completion[bot] = [[model.eval(v,model_completion=True).as_long() for v in cell] for cell in positions[bot][:T+1]]
+  return longest_valid_prefix, None
+
+def z3_stream(encoding='int'):
+  # Tick-by-tick validation of a ground plan that arrives one timestep at a time, as
+  # {bot:(x,y)}. Earlier ticks are never re-proven: a tick is checked in its own scope
+  # with the constraints that end at it, the earlier cells they involve being pinned again
+  # by their position literals. Avoidance between cells the plan pins apart holds already
+  # (see mutual_pairs), so self- and mutual-avoidance only look up the visits of the
+  # tick's cells: per-tick cost and solver size do not grow with the stream.
+  # Obstacles are active from a tick on, until removed: obstacle(kind,cell,t) adds or
+  # removes one from tick t, and an obstacle added in the past only rechecks the visits
+  # of its cell.
+  solver = Solver()
+  solver.set('core.minimize', True)
+  rank = {bot:k for k,bot in enumerate(bots)}
+  previous = {}      # bot -> cell at the previous tick
+  visits = {}        # cell -> {bot: [first tick there, last tick there]}
+  schedule = {tuple(o):[[0,None]] for o in obstacles}   # cell -> [from, until) spans
+  clock = [0]
+
+  tracked = {}       # assertion order and coordinates of the current scope
+  positions = {}
+  def track(term,name):
+    tracked.setdefault(name,len(tracked))
+    solver.assert_and_track(term,Bool(name))
+  def pin(bot,u,cell,enc):
+    x, y = positions[(bot,u)] = coordinate(f"x_{bot}_{u}",enc), coordinate(f"y_{bot}_{u}",enc)
+    track(x == cell[0],f"{bot}_x_{u}_{cell[0]}")
+    track(y == cell[1],f"{bot}_y_{u}_{cell[1]}")
+  def scope():
+    tracked.clear()
+    positions.clear()
+    solver.push()
+  def check(until=None):
+    # the tick's verdict, OK, UNSAT or unknown when the deadline until cut it short
+    verdict, core = 'OK', None
+    try:
+      solver.set('timeout',check_budget(until))
+      result = solver.check()
+    except TimeoutError:
+      result = unknown
+    if result==unsat:
+      verdict, core = 'UNSAT', sorted((str(p) for p in solver.unsat_core()), key=lambda p: tracked[p])
+    elif result==unknown:
+      verdict = 'unknown'
+    solver.pop()
+    return verdict, core
+
+  def as_cell(cell,what):
+    x_val, y_val = cell
+    if type(x_val) is not int or type(y_val) is not int:
+      raise ValueError(f"{what}: {cell} is not a cell")
+    return (x_val, y_val)
+
+  def tick(cells,until=None):
+    t = clock[0]
+    route = {bot:as_cell(cells[bot],bot) for bot in bots}
+    local = {bot:[cell] for bot,cell in route.items()}
+    enc = 'bv' if encoding=='bv' and fits_bv(local) and fits_bv({bot:[c] for bot,c in previous.items()}) else 'int'
+
+    # the earlier cells each family needs, found before the tick is indexed
+    earlier = {}
+    self_pairs = []
+    for bot in bots:
+      seen = visits.get(route[bot],{}).get(bot)
+      if seen is not None and route[bot]!=goal_positions[bot]:
+        self_pairs.append((bot,seen[0]))
+        earlier[(bot,seen[0])] = route[bot]
+    for bot, cell in route.items():
+      visits.setdefault(cell,{}).setdefault(bot,[t,t])[1] = t
+    mutual = []
+    for bot1 in bots:
+      cell = route[bot1]
+      for bot2, (t2,_) in sorted(visits[cell].items(), key=lambda c: rank[c[0]]):
+        if rank[bot2]>rank[bot1]:
+          mutual.append((bot1,bot2,t2))
+          if t2<t:
+            earlier[(bot2,t2)] = cell
+    if t>0:
+      earlier.update(((bot,t-1),cell) for bot,cell in previous.items())
+    active = [cell for cell,spans in schedule.items()
+              if any(a<=t and (b is None or t<b) for a,b in spans)]
+
+    scope()
+    for (bot,u), cell in sorted(earlier.items(), key=lambda c: (c[0][1],rank[c[0][0]])):
+      pin(bot,u,cell,enc)
+    for bot in bots:
+      pin(bot,t,route[bot],enc)
+    for bot in bots:
+      track(in_torus(*positions[(bot,t)],enc),f"{bot}_in_torus_{t}")
+    for bot, (xg,yg) in goal_positions.items():
+      if t>0:
+        track(motion_law(*positions[(bot,t-1)],*positions[(bot,t)],xg,yg,enc),f"{bot}_motion_law_ok_from_step_{t-1}_to_{t}")
+    for bot in bots:
+      x, y = positions[(bot,t)]
+      for ox, oy in active:
+        track(Or(x != ox, y != oy),f"{bot}_avoid_obstacle_{t}_{ox}_{oy}")
+    for bot, t1 in self_pairs:
+      xg, yg = goal_positions[bot]
+      track(self_avoid(*positions[(bot,t1)],*positions[(bot,t)],xg,yg),f"{bot}_{t}_self_avoid_{t1}_{t}")
+    for bot1, bot2, t2 in mutual:
+      xg1, yg1 = goal_positions[bot1]
+      xg2, yg2 = goal_positions[bot2]
+      track(mutual_avoid(*positions[(bot1,t)],xg1,yg1,t,*positions[(bot2,t2)],xg2,yg2,t2),f"{bot1}_{bot2}_mutual_avoid_{t}_{t2}")
+    verdict, core = check(until)
+
+    previous.update(route)
+    clock[0] = t+1
+    return t, verdict, core
+
+  def obstacle(kind,cell,t0=None,until=None):
+    # returns the earliest recorded visit the added obstacle covers, with the verdict and
+    # core of its check, or None
+    if kind not in ('add','remove'):
+      raise ValueError(f"unknown obstacle event {kind}, add or remove")
+    cell = as_cell(cell,'obstacle')
+    t0 = clock[0] if t0 is None else t0
+    spans = schedule.setdefault(cell,[])
+    if kind=='remove':
+      spans[:] = [[a,b if b is not None and b<=t0 else t0] for a,b in spans if a<t0]
+      if not spans:
+        del schedule[cell]
+      return None
+    spans.append([t0,None])
+    # cells already validated that the obstacle now covers: a bot's first visit of the
+    # cell when it is late enough, its last one otherwise
+    hits = []
+    for bot, (first,last) in visits.get(cell,{}).items():
+      u = first if first>=t0 else last
+      if t0<=u<clock[0]:
+        hits.append((u,rank[bot],bot))
+    if not hits:
+      return None
+    u, _, bot = min(hits)
+    scope()
+    pin(bot,u,cell,'int')
+    x, y = positions[(bot,u)]
+    track(Or(x != cell[0], y != cell[1]),f"{bot}_avoid_obstacle_{u}_{cell[0]}_{cell[1]}")
+    return (u,)+check(until)
+
+  return tick, obstacle
+
+def stream_lines(lines,reply,encoding='int',deadline=None):
+  # one timestep per line: {"BotA":[x,y],...} or [[x,y],...] in bot order, one reply per line.
+  # A line {"event":"add"|"remove","obstacle":[x,y],"t":t} changes the obstacles from tick
+  # t on (the next tick by default). A "deadline" key in seconds bounds the check of that
+  # line (deadline by default), its verdict is unknown when it runs out.
+  tick, obstacle = z3_stream(encoding)
+  for line in lines:
+    if not line.strip():
+      continue
+    start = time.perf_counter()
+    try:
+      cells = json.loads(line)
+      seconds = cells.get('deadline',deadline) if isinstance(cells,dict) else deadline
+      until = time.time()+seconds if seconds is not None else None
+      if isinstance(cells,dict) and 'event' in cells:
+        event = cells
+        hit = obstacle(event['event'],event['obstacle'],event.get('t'),until)
+        r = {'event':event['event'], 'obstacle':event['obstacle'], 'verdict':'OK' if hit is None else hit[1]}
+        if hit is not None:
+          r['t'] = hit[0]
+          if hit[2] is not None:
+            r['core'] = hit[2]
+        r['ms'] = round(1000*(time.perf_counter()-start),3)
+        reply(r)
+        continue
+      if isinstance(cells,list):
+        cells = dict(zip(bots,cells))
+      t, verdict, core = tick(cells,until)
+    except (ValueError, KeyError, TypeError) as e:
+      reply({'error':f"{type(e).__name__}: {e}"})
+      continue
+    r = {'t':t, 'verdict':verdict, 'ms':round(1000*(time.perf_counter()-start),3)}
+    if core is not None:
+      r['core'] = core
+    reply(r)
+
+def stream(source,encoding='int',deadline=None):
+  # source is - (stdin), a file or FIFO, a Unix socket path or [host:]port (TCP): every
+  # socket connection is a stream of its own, starting at t=0
+  import socketserver,stat
+  if source=='-':
+    stream_lines(sys.stdin,lambda r: print(json.dumps(r)),encoding,deadline)
+    return
+  if os.path.exists(source) and not stat.S_ISSOCK(os.stat(source).st_mode):
+    with open(source,'r') as f:
+      stream_lines(f,lambda r: print(json.dumps(r)),encoding,deadline)
+    return
+
+  class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+      lines = (line.decode() for line in self.rfile)
+      stream_lines(lines,lambda r: self.wfile.write(json.dumps(r).encode()+b'\n'),encoding,deadline)
+  if '/' in source:
+    if os.path.exists(source):
+      os.unlink(source)
+    server = socketserver.ThreadingUnixStreamServer(source,Handler)
+  else:
+    host, _, port = source.rpartition(':')
+    server = socketserver.ThreadingTCPServer((host or '127.0.0.1',int(port)),Handler)
+  print("streaming on", source)
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+
+templates = {}   # scenario and encoding -> term cache shared by every plan validated in it
+TEMPLATES = 8    # scenarios kept, least recently used ones dropped first
+
+def z3_template(encoding='int'):
+  # The constraints of the twin only depend on the scenario, not on the plan that is
+  # checked against it: one template per (grid, bots, starts, goals, obstacles, encoding)
+  # holds the coordinates and the tracked terms built so far, for any horizon. A daemon
+  # sees many scenarios: only the TEMPLATES most recently used are kept.
+  key = json.dumps(scenario(),sort_keys=True)+encoding
+  templates[key] = templates.pop(key,None) or {'positions':{}, 'terms':{}}
+  if len(templates) > TEMPLATES:
+    del templates[next(iter(templates))]
+  return templates[key]
+
+first_failure = None   # shared across the pool workers of parallel_validate
+
+def init_job(shared):
+  global first_failure
+  first_failure = shared
+
+def validate_job(sc,llm_plan,T,kwargs):
+  # runs in a pool worker, with its own z3 context. A job given seconds has its own
+  # deadline, counted from when the worker picks it up.
+  use_scenario(sc)
+  seconds = kwargs.pop('seconds',None)
+  if seconds is not None:
+    kwargs = dict(kwargs,until=time.time()+seconds)
+  profile, completion = kwargs.get('profile'), kwargs.get('completion')
+  with contextlib.redirect_stdout(io.StringIO()):
+    longest_valid_prefix, failure = z3_validate(llm_plan,T,bound=lambda: first_failure.value,**kwargs)
+  if failure is not None and failure[1] is not None:
+    with first_failure.get_lock():
+      first_failure.value = min(first_failure.value,failure[0])
+    failure = (failure[0], [str(p) for p in failure[1]])
+  return longest_valid_prefix, failure, profile, completion
+
+def parallel_validate(llm_plan,T,jobs,completion=None,**kwargs):
+  # Bot-local families of each bot are checked in a one-bot twin, in parallel.
+  # The coupled mutual-avoid family is checked on its own: it only needs the local
+  # families of bots with free cells, those of pinned bots are ground facts the
+  # per-bot jobs decide. The first failing step is the earliest over all jobs, and
+  # jobs stop once they are past a failing step another job reported. The mutual job
+  # asserts every constraint a free cell is in, its model is the completion.
+  sc = scenario()
+  free = [bot for bot in bots if bot not in llm_plan or
+          any(not isinstance(p,(list,tuple)) or None in p for p in llm_plan[bot])]
+  work = []
+  for bot in bots:
+    bot_sc = dict(sc, bots=[bot],
+                  start_positions={bot:sc['start_positions'][bot]},
+                  goal_positions={bot:sc['goal_positions'][bot]})
+    bot_plan = {bot:llm_plan[bot]} if bot in llm_plan else {}
+    work.append((bot_sc,bot_plan,T,kwargs))
+  work.append((sc,llm_plan,T,dict(kwargs,local_bots=free,completion={} if completion is not None else None)))
+  profile = kwargs.get('profile')
+  if kwargs.get('until') is not None:
+    # the mutual job, the largest, is queued first and has all the time left; the bot jobs
+    # run in waves on the other workers, each with its share of it from when it starts, or
+    # the queued ones would start past the deadline and prove nothing
+    left = max(kwargs['until']-time.time(),0)
+    waves = -(-len(bots)//max(jobs-1,1))
+    work = [(job_sc,job_plan,T,dict(job_kwargs,until=None,seconds=left/waves)) for job_sc,job_plan,T,job_kwargs in work[:-1]]+ \
+           [work[-1][:3]+(dict(work[-1][3],until=None,seconds=left),)]
+
+  ctx = multiprocessing.get_context('spawn')
+  shared = ctx.Value('i',T)
+  with concurrent.futures.ProcessPoolExecutor(max_workers=jobs,mp_context=ctx,
+                                              initializer=init_job,initargs=(shared,)) as pool:
+    results = list(pool.map(validate_job,*zip(*(work[-1:]+work[:-1]))))
+  results = results[1:]+results[:1]
+
+  if profile is not None:
+    for job, (_,_,rows,_) in zip(bots+['mutual'],results):
+      profile += [dict(r,job=job) for r in rows]
+  failures = [failure for _,failure,_,_ in results if failure is not None and failure[1] is not None]
+  # a job that ran out of time leaves its steps from t unproven, a failure after them may
+  # not be the first
+  unknown = min((failure[0] for _,failure,_,_ in results if failure is not None and failure[1] is None), default=T+1)
+  t_fail = min((t for t,_ in failures), default=T+1)
+  if unknown < t_fail:
+    for t in range(unknown):
+      print(t,"..")
+    return max(unknown-1,0), (unknown,None)
+  if not failures:
+    if completion is not None:
+      completion.update(results[-1][3])
+    for t in range(T+1):
+      print(t,"..")
+    return T, None
+  core = []
+  for t,names in failures:
+    if t==t_fail:
+      core += [name for name in names if name not in core]
+  for t in range(t_fail+1):
+    print(t,"..")
+  return max(t_fail-1,0), (t_fail,core)
+
+def validate(llm_plan,T,engine='auto',encoding='int',block=1,jobs=1,proven=None,template=False,profile=None,minimize=0,completion=None,
+             until=None,check_timeout=None):
+  # (longest valid prefix, failure): failure is None when SAT, (t,core) when UNSAT, and
+  # (t,None) when the deadline until (a time.time()) or check_timeout cut it short at t
+  ground = is_ground(llm_plan)
+  if profile is not None and engine=='auto':
+    engine = 'z3'     # the profile is a trace of the z3 solver
+  if engine=='ground' and not ground:
+    raise ValueError("The plan has free variables, it cannot be checked by the ground engine")
+  if encoding=='bv' and not fits_bv(llm_plan):
+    print(f"coordinates outside of [0,{2**bv_width()}) cannot be bit-vectors, using the int encoding")
+    encoding = 'int'
+  if (engine=='z3' or not ground) and jobs>1:
+    return parallel_validate(llm_plan,T,jobs,completion,proven=proven,block=block,encoding=encoding,profile=profile,minimize=minimize,
+                             until=until,check_timeout=check_timeout)
+  elif engine=='z3' or not ground:
+    return z3_validate(llm_plan,T,proven,block,encoding=encoding,template=z3_template(encoding) if template else None,
+                       profile=profile,minimize=minimize,completion=completion,until=until,check_timeout=check_timeout)
+  else:
+    return ground_validate(llm_plan,T,proven,until)
+
+def validate_plan(plan,sc=None,engine='auto',encoding='int',block=1,template=True,minimize=0,all_conflicts=False,
+                  cache=None,cache_size=10000,deadline=None,check_timeout=None):
+  # In-process API: validates a plan object {bot:route} as the planners return it, in the
+  # scenario sc (its keys override the current one, for this call only) or the current
+  # one. The plan is not modified. Returns {'verdict','timesteps','longest_valid_prefix'}, with 't' and 'core'
+  # on UNSAT, 'completion' {bot:route} when SAT and the solver filled free cells, and
+  # 'conflicts' {bot:[[t,name]]} when all_conflicts is set. With a cache file,
+  # a plan already validated in the same scenario is answered from it ('cached' is set).
+  # After deadline seconds, or a z3 check() of check_timeout seconds, the verdict is
+  # 'unknown' with 't' the step being checked.
+  if sc is not None:
+    saved = dict(scenario(),bots=list(bots))
+    use_scenario(dict(saved,**sc))
+    try:
+      return validate_plan(plan,None,engine,encoding,block,template,minimize,all_conflicts,cache,cache_size,
+                           deadline,check_timeout)
+    finally:
+      use_scenario(saved)
+  until = time.time()+deadline if deadline is not None else None
+  llm_plan = normalize_plan({bot:dict(route) if isinstance(route,dict) else list(route) for bot,route in plan.items()})
+  T = max(len(route) for route in llm_plan.values())-1
+  db = result_cache(cache) if cache is not None else None
+  key = plan_key(llm_plan,engine,encoding,minimize) if db is not None else None
+  result = cache_get(db,key) if db is not None else None
+  if result is not None:
+    result['cached'] = True
+  else:
+    completion = {} if not is_ground(llm_plan) else None
+    with contextlib.redirect_stdout(io.StringIO()):
+      longest_valid_prefix, failure = validate(llm_plan,T,engine,encoding,block,template=template,minimize=minimize,
+                                               completion=completion,until=until,check_timeout=check_timeout)
+    result = dict(result_of(T,longest_valid_prefix,failure),**({'completion':completion} if completion else {}))
+    if db is not None and result['verdict']!='unknown':
+      cache_put(db,key,result,cache_size)
+  if result['verdict']=='UNSAT' and all_conflicts and is_ground(llm_plan):
+    result['conflicts'] = {bot:[[t,name] for t,name in found] for bot,found in ground_conflicts(llm_plan,T).items()}
+  return result
+
+def load_planner(planner_file):
+  # the generate_robot_plan() of a planner script (vN.deepseek_planner.py), imported by path
+  import importlib.util
+  name = os.path.basename(planner_file).rsplit('.py',1)[0].replace('.','_')
+  spec = importlib.util.spec_from_file_location(name,planner_file)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module.generate_robot_plan
+
+def drive(planner_files,engine='auto'):
+  # generate -> validate in one process, for each planner in turn
+  for planner_file in planner_files:
+    start = time.perf_counter()
+    plan = load_planner(planner_file)()
+    generated = time.perf_counter()
+    result = validate_plan(plan,engine=engine)
+    done = time.perf_counter()
+    verdict = f"UNSAT at t={result['t']}" if result['verdict']=='UNSAT' else result['verdict']
+    print(f"{planner_file}: {verdict}, longest valid prefix {result['longest_valid_prefix']} "
+          f"(generated in {generated-start:.3f}s, validated in {done-generated:.3f}s)")
+    for name in result.get('core',[]):
+      print(f"  {name}")
+
+def serve_job(sc,request,cache=None,cache_size=10000,until=None):
+  # one validation request, in a warm daemon worker; until is its deadline, counted from
+  # its arrival
+  return validate_plan(request['plan'],dict(sc,obstacles=request.get('obstacles',sc['obstacles'])),
+                       request.get('engine','auto'),request.get('encoding','int'),request.get('check_block',1),
+                       request.get('template',True),request.get('minimize_core',0),request.get('all_conflicts',False),
+                       cache,cache_size,max(until-time.time(),0) if until is not None else None,request.get('check_timeout'))
+
+def serve(address,workers,cache=None,cache_size=10000,deadline=None):
+  # Requests are plan JSON objects {"plan":..., "obstacles":..., "engine":..., ...},
+  # POSTed over HTTP when address is [host:]port, one per line when it is a Unix socket path.
+  # Each is validated in a pool of warm worker processes, so they run concurrently.
+  # "deadline" and "check_timeout" (seconds) bound a request, deadline by default.
+  import http.server,socketserver
+  sc = scenario()
+  pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers,mp_context=multiprocessing.get_context('spawn'))
+  list(pool.map(use_scenario,[sc]*workers))
+
+  def answer(body):
+    try:
+      request = json.loads(body)
+      seconds = request.get('deadline',deadline)
+      until = time.time()+seconds if seconds is not None else None
+      return pool.submit(serve_job,sc,request,cache,cache_size,until).result()
+    except Exception as e:
+      return {'error':f"{type(e).__name__}: {e}"}
+
+  if '/' in address:
+    class Handler(socketserver.StreamRequestHandler):
+      def handle(self):
+        for line in self.rfile:
+          if line.strip():
+            self.wfile.write(json.dumps(answer(line)).encode()+b'\n')
+    if os.path.exists(address):
+      os.unlink(address)
+    server = socketserver.ThreadingUnixStreamServer(address,Handler)
+  else:
+    class Handler(http.server.BaseHTTPRequestHandler):
+      def do_POST(self):
+        reply = json.dumps(answer(self.rfile.read(int(self.headers.get('Content-Length',0))))).encode()
+        self.send_response(200 if b'"error"' not in reply else 400)
+        self.send_header('Content-Type','application/json')
+        self.send_header('Content-Length',str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+    host, _, port = address.rpartition(':')
+    server = http.server.ThreadingHTTPServer((host or '127.0.0.1',int(port)),Handler)
+  print("serving on", address)
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    pool.shutdown()
+
+def main():
+  global obstacles
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--plan', type=str,
+                      help='a JSON file containing LLM plan, or a .npy array (see --convert): that only skips the JSON parsing, the plan is still validated as lists')
+  parser.add_argument('--obstacles', type=str, help='a list of obstacle tuples')
+  parser.add_argument('--scenario', type=str, help='a JSON file with the grid size N, bots, start_positions, goal_positions and obstacles')
+  parser.add_argument('--engine', choices=['auto','z3','ground'], default='auto',
+                      help='auto: check ground plans directly on the coordinates, use z3 when the plan has free variables')
+  parser.add_argument('--check-block', type=int, default=1,
+                      help='timesteps asserted per z3 check() (0: check after every constraint family)')
+  parser.add_argument('--encoding', choices=['int','bv'], default='int',
+                      help='z3 sort of the coordinates: unbounded integers or bit-vectors')
+  parser.add_argument('--jobs', type=int, default=1,
+                      help='z3 worker processes: bot-local constraint families are checked per bot in parallel')
+  parser.add_argument('--template', action='store_true',
+                      help='z3: build the constraint terms once per scenario and reuse them across plans')
+  parser.add_argument('--baseline', type=str, help='a previously validated JSON plan: only constraints touching cells that differ from it are re-checked')
+  parser.add_argument('--minimize-core', type=float, default=0, metavar='SECONDS',
+                      help='z3: shrink the UNSAT core by deletion, for at most SECONDS (0: report it as found)')
+  parser.add_argument('--all-conflicts', action='store_true',
+                      help='on UNSAT, also report every violated constraint of the horizon, grouped per bot')
+  parser.add_argument('--profile', type=str, metavar='FILE',
+                      help='z3: write a per-timestep, per-constraint-family trace to FILE (.json or .csv) and print a summary')
+  parser.add_argument('--stream', type=str, metavar='SRC',
+                      help='validate live telemetry, one timestep of positions (or an obstacle event) per line, from - (stdin), a file or FIFO, a Unix socket path or [host:]port')
+  parser.add_argument('--repair', type=int, default=0, metavar='ROUNDS',
+                      help='on UNSAT, try up to ROUNDS local detours of the failing bots and write PLAN.repaired.json when they fix the plan (reported as REPAIRED, the verdict is still that of the submitted plan)')
+  parser.add_argument('--convert', type=str, metavar='FILE',
+                      help='write the (trimmed and padded) plan to FILE as a bots x steps x 2 int16 .npy array, rows in bot order, and exit')
+  parser.add_argument('--planner', type=str, nargs='+', metavar='PLANNER',
+                      help='import each planner script, call its generate_robot_plan() and validate the plan in process, in turn')
+  parser.add_argument('--batch', type=str, nargs='+', metavar='PLAN',
+                      help='check candidate plans (JSON, .npy, or one K x bots x steps x 2 .npy) at once on arrays, then prove the first valid one with --engine z3')
+  parser.add_argument('--reference', type=str, metavar='FILE',
+                      help='write a plan of the reference planner (space-time A*, conflict-based search when needed) to FILE and exit')
+  parser.add_argument('--horizon', type=int, help='--reference: the steps to plan within, twice the longest start to goal distance by default')
+  parser.add_argument('--deadline', type=float, metavar='SECONDS',
+                      help='stop after SECONDS with an unknown verdict and the prefix proven so far (with --serve and --stream: per request, by default; with --jobs, queued bot jobs each get a share of it)')
+  parser.add_argument('--check-timeout', type=float, metavar='SECONDS',
+                      help='z3: give up when a single check() runs longer than SECONDS, with an unknown verdict')
+  parser.add_argument('--cache', type=str, metavar='FILE',
+                      help='an SQLite file of past results: a plan already validated in the same scenario is answered from it')
+  parser.add_argument('--cache-size', type=int, default=10000, help='results kept in the cache, the least recently used go first')
+  parser.add_argument('--serve', type=str, metavar='ADDR', help='run as a daemon on [host:]port (HTTP) or on a Unix socket path')
+  args = parser.parse_args()
+  until = time.time()+args.deadline if args.deadline is not None else None
+
+  if args.scenario is not None:
+    load_scenario(args.scenario)
+
+  if args.obstacles is not None:
+    obstacles = ast.literal_eval(args.obstacles)
+    print("obstacles:")
+    for o in obstacles:
+      print(o)
+
+  if args.serve is not None:
+    serve(args.serve,args.jobs,args.cache,args.cache_size,args.deadline)
+    return
+
+  if args.stream is not None:
+    stream(args.stream,args.encoding,args.deadline)
+    return
+
+  if args.planner is not None:
+    drive(args.planner,args.engine)
+    return
+
+  if args.batch is not None:
+    try:
+      names, candidates = read_batch(args.batch)
+      results = batch_validate(candidates)
+    except ValueError as e:
+      print("error.", e)
+      sys.exit()
+    for name, result in zip(names,results):
+      if result['verdict']=='SAT':
+        print(f"{name}: SAT, {result['timesteps']} timesteps")
+      else:
+        print(f"{name}: UNSAT at t={result['t']}, {result['name']}")
+    valid = [k for k,result in enumerate(results) if result['verdict']=='SAT']
+    if not valid:
+      print("no valid candidate")
+      return
+    print("first valid candidate:", names[valid[0]])
+    if args.engine=='z3':
+      plan = candidates[valid[0]]
+      if not isinstance(plan,dict):
+        plan = dict(zip(bots,plan.tolist()))
+      result = validate_plan(plan,engine='z3')
+      print(f"z3: {result['verdict']}, longest valid prefix {result['longest_valid_prefix']}")
+    return
+
+  if args.reference is not None:
+    start = time.perf_counter()
+    plan, method, nodes = reference_plan(args.horizon)
+    elapsed = time.perf_counter()-start
+    if plan is None:
+      print(f"error. no plan found ({method}, {nodes} nodes, {elapsed:.3f}s)")
+      sys.exit()
+    with open(args.reference, 'w') as g:
+      json.dump(plan,g)
+    print(f"reference plan ({method}, {elapsed:.3f}s): {len(plan[bots[0]])-1} timesteps, written to", args.reference)
+    return
+
+  if args.plan is None:
+    print("error. You must submit a plan file")
+    sys.exit()
+
+  print(start_positions)
+  print(goal_positions)
+
+  try:
+    llm_plan = load_plan(args.plan)
+  except ValueError as e:
+    print("error.", e)
+    sys.exit()
+
+  if args.convert is not None:
+    try:
+      save_plan_array(args.convert,llm_plan)
+    except ValueError as e:
+      print("error.", e)
+      sys.exit()
+    print("plan written to", args.convert)
+    return
+
+  lengths = {len(route) for route in llm_plan.values()}
+  if len(lengths)!=1:
+    print("ERROR, path len mismatch")
+    sys.exit()
+
+  T=len(llm_plan.get(bots[0],next(iter(llm_plan.values()))))-1
+  print("Timesteps:",T)
+  print()
+
+  proven = None
+  if args.baseline is not None:
+    cert = read_certificate(args.baseline)
+    if cert is None:
+      print("no certificate for baseline", args.baseline, "in this scenario, validating from t=0")
+    else:
+      changed = diff_plan(llm_plan,cert)
+      divergence = min((t for _,t in changed), default=T+1)
+      proven = (changed, cert['longest_valid_prefix'])
+      print(f"baseline {args.baseline}: first divergent timestep {divergence}, proven prefix {cert['longest_valid_prefix']}")
+      print()
+
+  profile = [] if args.profile is not None else None
+  completion = {} if not is_ground(llm_plan) else None
+  if args.all_conflicts and not is_ground(llm_plan):
+    print("error. --all-conflicts needs a plan with a position for every bot at every step")
+    sys.exit()
+
+  # a profile is a trace of this run: it is never answered from the cache
+  db = result_cache(args.cache) if args.cache is not None and profile is None else None
+  key = plan_key(llm_plan,args.engine,args.encoding,args.minimize_core) if db is not None else None
+  cached = cache_get(db,key) if db is not None else None
+  if cached is not None:
+    print("cached result of", key[:16])
+    longest_valid_prefix = cached['longest_valid_prefix']
+    failure = (cached['t'],cached['core']) if cached['verdict']=='UNSAT' else None
+    if completion is not None:
+      completion.update(cached.get('completion',{}))
   else:
-        dump_unsat(t,prefix_solver)
-        print("Longest valid prefix:", longest_valid_prefix)
-        sys.exit()
+    try:
+      longest_valid_prefix, failure = validate(llm_plan,T,args.engine,args.encoding,args.check_block,args.jobs,proven,args.template,profile,
+                                               args.minimize_core,completion,until,args.check_timeout)
+    except ValueError as e:
+      print("error.", e)
+      sys.exit()
+    if db is not None and (failure is None or failure[1] is not None):
+      cache_put(db,key,dict(result_of(T,longest_valid_prefix,failure),**({'completion':completion} if completion else {})),
+                args.cache_size)
+  if profile is not None:
+    write_profile(args.profile,profile)
+    print()
+    dump_profile(profile)
+  write_certificate(args.plan,llm_plan,failure[0]-1 if failure else longest_valid_prefix,failure is None)
+
+  if failure is not None and failure[1] is None:
+    print()
+    print(f"UNKNOWN: out of time while checking t={failure[0]}")
+    print("Longest valid prefix:", max(failure[0]-1,0))
+    sys.exit()
+
+  if failure is not None and args.repair and is_ground(llm_plan):
+    plan, prefix, left, done = repair(llm_plan,T,failure,args.repair)
+    for bot, anchor, t in done:
+      print(f"repaired {bot}: detour from t={anchor} for the conflict at t={t}")
+    if left is None:
+      repaired_file = os.path.splitext(args.plan)[0]+'.repaired.json'
+      with open(repaired_file, 'w') as g:
+        json.dump(plan,g)
+      write_certificate(repaired_file,plan,prefix,True)
+      print(f"REPAIRED: {repaired_file} (SAT, longest valid prefix {prefix})")
+    else:
+      print("local repair failed, the plan still fails at t =", left[0])
+    print()
+
+  if failure is not None:
+    dump_core(*failure)
+    if args.all_conflicts:
+      print()
+      dump_conflicts(ground_conflicts(llm_plan,T))
+      print()
+    print("Longest valid prefix:", longest_valid_prefix)
+    sys.exit()
+
+  if completion:
+    completed_file = os.path.splitext(args.plan)[0]+'.completed.json'
+    with open(completed_file, 'w') as g:
+      json.dump(completion,g)
+    print("plan completed by the solver, written to", completed_file)
 
-print()
-if allsat:
+  print()
   print("SAT")
-print("Longest valid prefix:", longest_valid_prefix)
+  print("Longest valid prefix:", longest_valid_prefix)
 
+if __name__ == '__main__':
+  main()